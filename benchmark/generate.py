@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+'''Generate synthetic rosters and grade files for the benchmarks.
+
+    The layout is the one Gradesystem.py expects:
+        root/student_list/2015级名单.xlsx   # 每个年级一个名单，sheet 录取结果
+        root/data/F1526001-2015-2016-1.xls  # 每个班每个学期一个成绩文件
+        root/app/                           # 运行目录，名单路径是 ../student_list
+        root/output/
+
+    Usage:
+        python generate.py ROOT --scale cohort --format html
+'''
+
+import os
+import sys
+import argparse
+import random
+
+import numpy as np
+import pandas as pd
+
+# 规模：年级数，每个年级的班数，每个班的学生数，学期数，每学期的课程数
+SCALES = {
+    "class": dict(cohorts=1, classes=1, students=30, semesters=8, courses=10),
+    "cohort": dict(cohorts=1, classes=10, students=30, semesters=8, courses=10),
+    "school": dict(cohorts=10, classes=10, students=30, semesters=8, courses=10),
+    "max": dict(cohorts=50, classes=10, students=30, semesters=8, courses=10),
+}
+
+MAJORS = ["IE信息工程", "ME机械工程", "EPE能源与动力工程"]
+SOURCES = ["法语", "工科试验班类（中外合作办学）"]
+FIRST_YEAR = 2015
+
+
+def cohort_roster(rng, year, classes, students):
+    '''To make the roster of a cohort, columns 姓名, 学号, 班级, 录取专业, 招生来源.'''
+    yy = year % 100
+    rows = []
+    for c in range(1, classes + 1):
+        class_id = "F{:02d}26{:03d}".format(yy, c)
+        for s in range(students):
+            rows.append({"姓名": "学生{}_{}_{}".format(yy, c, s),
+                         "学号": 500000000 + yy * 1000000 + 26 * 10000 + c * 100 + s,
+                         "班级": class_id,
+                         "录取专业": MAJORS[rng.randint(0, len(MAJORS) - 1)],
+                         "招生来源": SOURCES[rng.randint(0, len(SOURCES) - 1)]})
+    return pd.DataFrame(rows, columns=["姓名", "学号", "班级", "录取专业", "招生来源"])
+
+
+def rng_normal(rng, n, mean, std):
+    return np.asarray([rng.gauss(mean, std) for _ in range(n)])
+
+
+def grade_sheet(rng, students, courses):
+    '''To make the rows of a grade file: 学号, 姓名, 班号, then a (成绩, 学分) pair for every course.'''
+    header = ["学号", "姓名", "班号"]
+    for k in range(courses):
+        header += ["课程{}".format(k), "学分"]
+    n = len(students)
+    scores = np.clip(np.round(rng_normal(rng, n * courses, 78, 10)), 0, 100).astype(int).astype(object)
+    # 少量的P和空成绩
+    kind = np.asarray([rng.random() for _ in range(n * courses)])
+    scores[kind < 0.05] = "P"
+    scores[(kind >= 0.05) & (kind < 0.10)] = ""
+    scores = scores.reshape(n, courses)
+    credits = [(k % 4) + 1 for k in range(courses)]
+    rows = [header]
+    for i, (student_id, student_name, class_id) in enumerate(students):
+        row = [student_id, student_name, class_id]
+        for k in range(courses):
+            row += [scores[i, k], credits[k]]
+        rows.append(row)
+    return rows
+
+
+def write_html(file_path, rows):
+    '''To write the rows like the html tables named as .xls exported by the school system.'''
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("<html><head><meta charset=\"utf-8\"></head><body><table>")
+        for row in rows:
+            f.write("<tr>")
+            for cell in row:
+                f.write("<td>{}</td>".format(cell))
+            f.write("</tr>")
+        f.write("</table></body></html>")
+
+
+def write_xls(file_path, rows):
+    '''To write the rows into a real Excel 97 file, it needs xlwt.'''
+    import xlwt
+    book = xlwt.Workbook(encoding="utf-8")
+    sheet = book.add_sheet("Sheet1")
+    for i, row in enumerate(rows):
+        for j, cell in enumerate(row):
+            # 空成绩不写入单元格
+            if cell != "":
+                sheet.write(i, j, cell)
+    book.save(file_path)
+
+
+def semesters(year, n):
+    '''To list the first n semesters of a cohort as (year_start, year_end, number).'''
+    result = []
+    for i in range(n):
+        start = year + i // 2
+        result.append((start, start + 1, i % 2 + 1))
+    return result
+
+
+def generate(root, cohorts=1, classes=1, students=30, semesters_n=8, courses=10, file_format="html", seed=0):
+    '''To generate a data set under root, return the number of students and grade files.'''
+    rng = random.Random(seed)
+    for name in ("student_list", "data", "app", "output"):
+        path = os.path.join(root, name)
+        if not os.path.exists(path):
+            os.makedirs(path)
+    write = write_xls if file_format == "xls" else write_html
+
+    n_students, n_files = 0, 0
+    for i in range(cohorts):
+        year = FIRST_YEAR + i
+        roster = cohort_roster(rng, year, classes, students)
+        roster.to_excel(os.path.join(root, "student_list", "{}级名单.xlsx".format(year)),
+                        sheet_name="录取结果", index=False)
+        n_students += roster.shape[0]
+        for class_id, group in roster.groupby("班级", sort=True):
+            members = list(zip(group["学号"], group["姓名"], group["班级"]))
+            for year_start, year_end, number in semesters(year, semesters_n):
+                file_name = "{}-{}-{}-{}.xls".format(class_id, year_start, year_end, number)
+                write(os.path.join(root, "data", file_name), grade_sheet(rng, members, courses))
+                n_files += 1
+    return n_students, n_files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic data for the Gradesystem benchmarks.")
+    parser.add_argument("root", help="output folder")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="class")
+    parser.add_argument("--format", dest="file_format", choices=["html", "xls"], default="html")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scale = SCALES[args.scale]
+    n_students, n_files = generate(args.root, scale["cohorts"], scale["classes"], scale["students"],
+                                   scale["semesters"], scale["courses"], args.file_format, args.seed)
+    print("{} students, {} grade files in {}".format(n_students, n_files, args.root))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
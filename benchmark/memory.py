@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+'''Measure the memory kept by Gradesystem.py for a synthetic archive.
+
+    Measures, with tracemalloc:
+        load        # Controler 读取全部名单和成绩后保留的内存
+        students    # 所有 Student 对象
+        grades      # 每个学生每学期的 Grades_data 和 Grade 对象（查看成绩时产生）
+        semesters   # 每个学生查询一次学期范围产生的 Semester 对象
+
+    Usage:
+        python memory.py --scale school --save-baseline
+        python memory.py --scale school         # 与 baselines/memory-school-html.json 比较
+'''
+
+import os
+import sys
+import gc
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+import generate
+
+
+def retained(function):
+    '''To run function and return (its result, the bytes still allocated by it after it returns).'''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = function()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+def run_measures(root):
+    import Gradesystem as gs
+    # 先导入用到的库，不计入保留的内存
+    import numpy
+    import pandas
+    import openpyxl
+    from lxml import etree
+
+    config = gs.Config(output_path=os.path.join(root, "output"), cache_path=None, workers=1)
+    records = {}
+
+    def record(name, size, items, unit):
+        records[name] = {"bytes": size, "items": items, "unit": unit, "bytes_per_item": size / items if items else None}
+        print("{:<10} {:>10.1f} MB  {:>8} {}  {:>8.0f} B/{}".format(name, size / 1024 / 1024, items, unit,
+                                                                     size / items if items else 0, unit))
+
+    # 第一次读取时还会导入pandas的子模块，测量第二次读取
+    gs.Controler(config)
+    controler, size = retained(lambda: gs.Controler(config))
+    record("load", size, controler.get_report()["counters"].get("grades", 0), "grades")
+
+    def make_students():
+        students = []
+        for file_name in sorted(os.listdir(config.student_list_path)):
+            roster = gs.read_roster(os.path.join(config.student_list_path, file_name))
+            for student_name, student_id, class_id, major, source in zip(
+                    *[roster[column].tolist() for column in gs.ROSTER_COLUMNS]):
+                students.append(gs.Student(student_name, student_id, file_name[0:5], class_id, major, source,
+                                           controler.grade_store))
+        return students
+
+    students, size = retained(make_students)
+    record("students", size, len(students), "students")
+
+    def make_grades():
+        kept = []
+        for student in controler.student_dic.values():
+            for grades_data in student.get_grades_data():
+                kept.append((grades_data, grades_data.get_grades()))
+        return kept
+
+    kept, size = retained(make_grades)
+    record("grades", size, sum(len(grades) for _, grades in kept), "grades")
+    del kept
+
+    def make_semesters():
+        kept = []
+        for student in controler.student_dic.values():
+            year = int(student.get_student_year()[0:4])
+            first = gs.Semester(str(year), str(year + 1), "1")
+            last = gs.Semester(str(year + 3), str(year + 4), "2")
+            kept.append(gs.semester_range(first, last))
+        return kept
+
+    kept, size = retained(make_semesters)
+    record("semesters", size, sum(len(semesters) for semesters in kept), "semesters")
+    return records
+
+
+def compare(records, baseline, tolerance):
+    '''To compare the bytes of every measure with the baseline, return the names of the larger ones.'''
+    regressions = []
+    for name, record in records.items():
+        old = baseline.get("measures", {}).get(name)
+        if old is None or not old.get("bytes"):
+            continue
+        ratio = record["bytes"] / old["bytes"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  <-- larger"
+            regressions.append(name)
+        print("{:<10} {:>10.1f} MB  baseline {:>10.1f} MB  x{:.2f}{}".format(
+            name, record["bytes"] / 1024 / 1024, old["bytes"] / 1024 / 1024, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the memory kept by Gradesystem.py.")
+    parser.add_argument("--scale", choices=sorted(generate.SCALES), default="school")
+    parser.add_argument("--format", dest="file_format", choices=["html", "xls"], default="html")
+    parser.add_argument("--root", help="use or keep the data set in this folder instead of a temporary one")
+    parser.add_argument("--baseline", help="baseline json, default baselines/memory-SCALE-FORMAT.json")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed growth before failing")
+    args = parser.parse_args(argv)
+
+    root = args.root
+    temporary = root is None
+    if temporary:
+        root = tempfile.mkdtemp(prefix="gradesystem-memory-")
+    if not os.path.exists(os.path.join(root, "data")):
+        scale = generate.SCALES[args.scale]
+        n_students, n_files = generate.generate(root, scale["cohorts"], scale["classes"], scale["students"],
+                                                scale["semesters"], scale["courses"], args.file_format)
+        print("{} students, {} grade files".format(n_students, n_files))
+
+    cwd = os.getcwd()
+    os.chdir(os.path.join(root, "app"))
+    try:
+        records = run_measures(root)
+    finally:
+        os.chdir(cwd)
+        if temporary:
+            shutil.rmtree(root, ignore_errors=True)
+
+    result = {"scale": args.scale, "format": args.file_format, "python": platform.python_version(),
+              "measures": records}
+    baseline_path = args.baseline
+    if baseline_path is None:
+        baseline_path = os.path.join(BENCHMARK_DIR, "baselines",
+                                     "memory-{}-{}.json".format(args.scale, args.file_format))
+    if args.save_baseline:
+        if not os.path.exists(os.path.dirname(baseline_path)):
+            os.makedirs(os.path.dirname(baseline_path))
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print("baseline saved to", baseline_path)
+        return 0
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(records, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
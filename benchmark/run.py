@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+'''Benchmark the whole pipeline of Gradesystem.py on a synthetic data set.
+
+    Stages:
+        load                # 第一次读取：名单、解析成绩文件、建立成绩数据（不使用缓存）
+        load_cached         # 使用解析缓存再次读取
+        reload              # 成绩文件没有变化时的 reload
+        query               # 每个年级全部学期的 GPA、学积分和排名
+        query_cached        # 同上，结果已在 Controler 的查询缓存中
+        per_student         # 逐个学生调用 Student.calculate_gpa / calculate_caa，不使用结果缓存
+        per_student_cached  # 同上，结果已在 GradeStore 的缓存中
+        export              # 导出 xlsx
+
+    The stages except the *_cached ones run with the result caches disabled, so every
+    repeat recomputes the results.
+
+    Every stage is timed without tracemalloc (best of --repeat runs), then run once more
+    under tracemalloc to record the peak memory. Worker processes are not traced, so the
+    default is --workers 1.
+
+    Usage:
+        python run.py --scale cohort --save-baseline
+        python run.py --scale cohort            # 与 baselines/cohort-html.json 比较
+'''
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+import generate
+
+
+def measure(function, repeat, memory=True):
+    '''To run function repeat times, return (best seconds, peak bytes, result of the last timed run).'''
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak, result
+
+
+def run_stages(root, repeat, workers, memory):
+    '''To run every stage on the data set in root, return {stage: record}.'''
+    import Gradesystem as gs
+
+    output_path = os.path.join(root, "output")
+    cache_path = os.path.join(root, "cache")
+    years = sorted(name[0:4] for name in os.listdir(os.path.join(root, "student_list")))
+    semesters = {}
+    for file_name in os.listdir(os.path.join(root, "data")):
+        year = "20" + file_name[1:3]
+        parts = file_name.split(".")[0].split("-")
+        semesters.setdefault(year, set()).add((parts[1], parts[2], parts[3]))
+    semesters = {year: [gs.Semester(*code) for code in sorted(codes)] for year, codes in semesters.items()}
+
+    def config(result_caches=False):
+        # 默认不缓存计算结果，每次重复都重新计算
+        sizes = {} if result_caches else dict(metric_cache_size=0, query_cache_size=0)
+        return gs.Config(output_path=output_path, cache_path=None, workers=workers, file_name="benchmark", **sizes)
+
+    records = {}
+
+    def record(name, seconds, peak, items, unit):
+        records[name] = {"seconds": seconds, "peak_bytes": peak, "items": items, "unit": unit,
+                         "per_second": items / seconds if seconds > 0 else None}
+        print("{:<18} {:>9.3f} s  {:>12} {}/s  peak {}".format(
+            name, seconds, "{:.0f}".format(items / seconds) if seconds > 0 else "-", unit,
+            "-" if peak is None else "{:.1f} MB".format(peak / 1024 / 1024)))
+
+    # 第一次读取
+    seconds, peak, controler = measure(lambda: gs.Controler(config()), repeat, memory)
+    report = controler.get_report()
+    n_grades = report["counters"].get("grades", 0)
+    record("load", seconds, peak, n_grades, "grades")
+    for stage in ("roster", "list", "parse", "update"):
+        if stage in report["stages"]:
+            records["load." + stage] = {"seconds": report["stages"][stage]["seconds"]}
+
+    # 使用缓存再次读取
+    if os.path.exists(cache_path):
+        shutil.rmtree(cache_path)
+
+    def cached_config():
+        c = config(result_caches=True)
+        c.set_cache_path(cache_path)
+        return c
+
+    gs.Controler(cached_config())
+    seconds, peak, cached_controler = measure(lambda: gs.Controler(cached_config()), repeat, memory)
+    record("load_cached", seconds, peak, n_grades, "grades")
+
+    seconds, peak, _ = measure(controler.reload, repeat, memory)
+    record("reload", seconds, peak, len(os.listdir(os.path.join(root, "data"))), "files")
+
+    def query(controler, save=False):
+        n = 0
+        for year in years:
+            students = list(controler.get_student_dic(year + "级").values())
+            controler.write_excel(students, semesters.get(year, []), controler.config, save=save)
+            n += len(students)
+        return n
+
+    seconds, peak, n_students = measure(lambda: query(controler), repeat, memory)
+    record("query", seconds, peak, n_students, "students")
+
+    query(cached_controler)
+    seconds, peak, _ = measure(lambda: query(cached_controler), repeat, memory)
+    record("query_cached", seconds, peak, n_students, "students")
+
+    def per_student(controler):
+        n = 0
+        for year in years:
+            for student in controler.get_student_dic(year + "级").values():
+                student.calculate_gpa(semesters.get(year, []))
+                student.calculate_caa(semesters.get(year, []))
+                n += 1
+        return n
+
+    seconds, peak, n = measure(lambda: per_student(controler), repeat, memory)
+    record("per_student", seconds, peak, n, "students")
+
+    # 使用默认缓存大小的 Controler，先计算一次
+    per_student(cached_controler)
+    seconds, peak, n = measure(lambda: per_student(cached_controler), repeat, memory)
+    record("per_student_cached", seconds, peak, n, "students")
+
+    seconds, peak, _ = measure(lambda: query(controler, save=True), 1, memory)
+    record("export", seconds, peak, n_students, "students")
+    return records
+
+
+def compare(records, baseline, tolerance):
+    '''To compare the time of every stage with the baseline, return the names of the slower stages.'''
+    regressions = []
+    for name, record in records.items():
+        old = baseline.get("stages", {}).get(name)
+        if old is None or not old.get("seconds"):
+            continue
+        ratio = record["seconds"] / old["seconds"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  <-- slower"
+            regressions.append(name)
+        print("{:<18} {:>9.3f} s  baseline {:>9.3f} s  x{:.2f}{}".format(name, record["seconds"], old["seconds"],
+                                                                       ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Gradesystem.py on synthetic data.")
+    parser.add_argument("--scale", choices=sorted(generate.SCALES), default="class")
+    parser.add_argument("--format", dest="file_format", choices=["html", "xls"], default="html")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc runs")
+    parser.add_argument("--root", help="use or keep the data set in this folder instead of a temporary one")
+    parser.add_argument("--baseline", help="baseline json, default baselines/SCALE-FORMAT.json")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing")
+    parser.add_argument("--output", help="write the results of this run into a json file")
+    args = parser.parse_args(argv)
+
+    root = args.root
+    temporary = root is None
+    if temporary:
+        root = tempfile.mkdtemp(prefix="gradesystem-benchmark-")
+    if not os.path.exists(os.path.join(root, "data")):
+        scale = generate.SCALES[args.scale]
+        n_students, n_files = generate.generate(root, scale["cohorts"], scale["classes"], scale["students"],
+                                                scale["semesters"], scale["courses"], args.file_format)
+        print("{} students, {} grade files".format(n_students, n_files))
+
+    # Gradesystem.py 从 ../student_list 读取名单
+    cwd = os.getcwd()
+    os.chdir(os.path.join(root, "app"))
+    try:
+        records = run_stages(root, args.repeat, args.workers, args.memory)
+    finally:
+        os.chdir(cwd)
+        if temporary:
+            shutil.rmtree(root, ignore_errors=True)
+
+    result = {"scale": args.scale, "format": args.file_format, "workers": args.workers,
+              "python": platform.python_version(), "machine": platform.machine(),
+              "time": time.strftime("%Y-%m-%d %H:%M:%S"), "stages": records}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    baseline_path = args.baseline
+    if baseline_path is None:
+        baseline_path = os.path.join(BENCHMARK_DIR, "baselines", "{}-{}.json".format(args.scale, args.file_format))
+    if args.save_baseline:
+        if not os.path.exists(os.path.dirname(baseline_path)):
+            os.makedirs(os.path.dirname(baseline_path))
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print("baseline saved to", baseline_path)
+        return 0
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(records, baseline, args.tolerance)
+        if regressions:
+            print("slower than the baseline:", ", ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
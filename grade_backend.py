@@ -0,0 +1,2118 @@
+# -*- coding: utf-8 -*-
+'''Back part of Gradesystem: the grade files, the students, the grades and the rankings.
+
+    It does not import PyQt5, so it can be used by the command line and on servers without a display.
+'''
+
+import os
+import sys
+import hashlib
+import csv
+import bisect
+import json
+import time
+import logging
+import io
+import re
+import importlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# 调试信息通过 logging 输出，默认只显示 WARNING 以上
+logger = logging.getLogger("gradesystem")
+
+
+class LazyModule:
+    ''' A module which is imported when one of its attributes is used for the first time.
+
+        Arguments:
+            name    # 模块名，例如 "pandas"
+            alias   # 本模块中的变量名，第一次使用后替换为真正的模块
+
+    '''
+
+    def __init__(self, name, alias):
+        self.name = name
+        self.alias = alias
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.name)
+        globals()[self.alias] = module
+        return getattr(module, attr)
+
+
+# pandas 和 numpy 导入较慢，只在第一次用到时导入
+pd = LazyModule("pandas", "pd")
+np = LazyModule("numpy", "np")
+
+
+########################################
+# Rule for GPA
+########################################
+class GradeScale:
+    ''' A table which maps the scores to the grade points.
+
+        Arguments:
+            breakpoints     # 每一档的最低分，递增
+            points          # 每一档的绩点，第一个是低于最低档时的绩点，比breakpoints多一个
+            max_score       # 满分，超过满分的成绩绩点为0
+
+    '''
+
+    def __init__(self, breakpoints, points, max_score=100):
+        self.breakpoints = tuple(float(b) for b in breakpoints)
+        self.points = tuple(float(p) for p in points)
+        self.max_score = float(max_score)
+        if len(self.points) != len(self.breakpoints) + 1 or \
+                any(b >= c for b, c in zip(self.breakpoints, self.breakpoints[1:])):
+            raise ValueError("The format of grade scale is wrong!")
+        # numpy 数组在第一次 map 时生成
+        self.arrays = None
+
+    def map(self, scores):
+        '''To map an array of scores to the grade points.'''
+        if self.arrays is None:
+            self.arrays = np.asarray(self.breakpoints), np.asarray(self.points)
+        breakpoints, points = self.arrays
+        scores = np.asarray(scores, dtype=float)
+        points = points[np.searchsorted(breakpoints, scores, side='right')]
+        # 超过满分或为空的成绩绩点为0
+        points[~(scores <= self.max_score)] = 0.0
+        return points
+
+    def __call__(self, score):
+        score = float(score)
+        if not score <= self.max_score:
+            return 0.0
+        return self.points[bisect.bisect_right(self.breakpoints, score)]
+
+    def key(self):
+        '''To get a hashable key of the table.'''
+        return self.breakpoints, self.points, self.max_score
+
+
+def load_grade_scale(file_path):
+    '''To load a GradeScale from a json file like {"breakpoints": [...], "points": [...], "max_score": 100}.'''
+    with open(file_path, encoding='utf-8') as f:
+        table = json.load(f)
+    return GradeScale(table["breakpoints"], table["points"], table.get("max_score", 100))
+
+
+DEFAULT_GRADE_SCALE = GradeScale([60, 62, 65, 67, 70, 75, 80, 85, 90, 95],
+                                 [0.0, 1.0, 1.7, 2.0, 2.3, 2.7, 3.0, 3.3, 3.7, 4.0, 4.3])
+
+
+def credit_rule(score):
+    return DEFAULT_GRADE_SCALE(score)
+
+
+########################################
+# Files
+########################################
+def file_digest(file_path, block_size=1 << 20):
+    '''To get the md5 of a file's content.'''
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+# 解析方式改变时需要增加版本号，旧的缓存会自动失效
+PARSER_VERSION = 3
+
+# 文件开头的字节，用于识别真正的Excel文件
+XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+XLSX_MAGIC = b'PK\x03\x04'
+
+
+class SheetCache:
+    ''' Parsed sheets stored on disk, keyed by the hash of the source file and PARSER_VERSION.
+
+        Arguments:
+            cache_path  # 缓存文件夹
+            max_size    # 缓存文件夹的最大容量（字节），超出时删除最久未使用的文件
+            max_age     # 缓存文件的最长保留时间（天）
+
+    '''
+
+    suffix = ".pkl"
+
+    def __init__(self, cache_path, max_size=512 * 1024 * 1024, max_age=90):
+        self.cache_path = cache_path
+        self.max_size = max_size
+        self.max_age = max_age
+
+    def entry_path(self, digest):
+        return os.path.join(self.cache_path, "{}-v{}{}".format(digest, PARSER_VERSION, self.suffix))
+
+    def get(self, digest):
+        '''To read a parsed sheet, return None if it is not cached.'''
+        entry_path = self.entry_path(digest)
+        if not os.path.exists(entry_path):
+            return None
+        try:
+            sheet = pd.read_pickle(entry_path)
+        except Exception:
+            # 缓存文件损坏，删除后重新解析
+            self.remove(entry_path)
+            return None
+        # 更新修改时间，用于按最久未使用淘汰，只读的缓存文件夹不更新
+        try:
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+        return sheet
+
+    def put(self, digest, sheet):
+        '''To store a parsed sheet.'''
+        entry_path = self.entry_path(digest)
+        # 先写临时文件再替换，避免读到写了一半的缓存
+        temp_path = entry_path + ".tmp"
+        try:
+            if not os.path.exists(self.cache_path):
+                os.makedirs(self.cache_path)
+            sheet.to_pickle(temp_path)
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            # 缓存文件夹不可写时不使用缓存
+            logger.warning("写入缓存%s出错: %s", entry_path, e)
+            self.remove(temp_path)
+
+    def remove(self, entry_path):
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
+
+    def evict(self):
+        '''To remove the entries of old parser versions, the expired entries and the least recently used
+        entries beyond max_size.'''
+        if not os.path.exists(self.cache_path):
+            return
+        version = "-v{}{}".format(PARSER_VERSION, self.suffix)
+        deadline = time.time() - self.max_age * 24 * 3600
+        entries = []
+        for file_name in os.listdir(self.cache_path):
+            if not file_name.endswith(self.suffix):
+                continue
+            entry_path = os.path.join(self.cache_path, file_name)
+            try:
+                stat = os.stat(entry_path)
+            except OSError:
+                # 已被其他进程删除
+                continue
+            if not file_name.endswith(version) or stat.st_mtime < deadline:
+                self.remove(entry_path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self.remove(entry_path)
+            total_size -= size
+
+
+def detect_format(file_path):
+    '''To get the real format of a grade file from its first bytes: "xls", "xlsx" or "html".'''
+    with open(file_path, 'rb') as f:
+        head = f.read(8)
+    if head.startswith(XLS_MAGIC):
+        return "xls"
+    if head.startswith(XLSX_MAGIC):
+        return "xlsx"
+    return "html"
+
+
+def iter_html_rows(file_path):
+    '''To read the cells of the first table of a html file row by row, each row is freed once it is read.'''
+    from lxml import etree
+    with open(file_path, 'rb') as f:
+        for _, element in etree.iterparse(f, events=("end",), tag=("tr", "table"), html=True, encoding='utf-8'):
+            if element.tag == "table":
+                break
+            # 大部分单元格只有文字，没有子元素
+            yield [(cell.text or "").strip() if len(cell) == 0 else "".join(cell.itertext()).strip()
+                   for cell in element if cell.tag in ("td", "th")]
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+
+def html_sheet(rows):
+    '''To build the sheet from the rows of a html table, the first row is the header.
+
+        学号, 姓名, 班号 stay str, the credit columns become float, the score columns are float too
+        unless they hold str such as P, empty cells are nan.
+    '''
+    if len(rows) == 0:
+        raise ValueError("No table found")
+    header = [intern_str(name) for name in rows[0]]
+    n_column = len(header)
+    body = [row[:n_column] + [""] * (n_column - len(row)) for row in rows[1:]]
+    columns = {}
+    for j, column in enumerate(zip(*body)):
+        values = np.empty(len(body), dtype=object)
+        values[:] = column
+        empty = values == ""
+        values[empty] = np.nan
+        if j >= 3:
+            numbers = pd.to_numeric(values, errors='coerce')
+            if (j - 3) % 2 == 1 or not np.any(np.isnan(numbers) & ~empty):
+                # 学分列和全是数字的成绩列用float存储
+                values = numbers.astype(float)
+            else:
+                values = np.where(np.isnan(numbers), values, numbers)
+        columns[j] = values
+    for j in range(len(columns), n_column):
+        # 只有表头没有学生
+        columns[j] = np.empty(0, dtype=object)
+    sheet = pd.DataFrame(columns, columns=range(n_column))
+    # 学分列名重复，不能直接用列名建立DataFrame
+    sheet.columns = header
+    return sheet
+
+
+def parse_xls(file_path):
+    '''To parse a grade file, most of them are html tables named as .xls.
+
+        It is a module level function so that it can be run in a process pool.
+    '''
+    file_format = detect_format(file_path)
+    if file_format != "html":
+        return pd.read_excel(file_path)
+    return html_sheet(list(iter_html_rows(file_path)))
+
+
+# 名单中用到的列
+ROSTER_COLUMNS = ["姓名", "学号", "班级", "录取专业", "招生来源"]
+
+
+def read_roster(file_path):
+    '''To read the five used columns of the sheet 录取结果 of a roster.'''
+    roster = pd.read_excel(file_path, sheet_name="录取结果", usecols=ROSTER_COLUMNS)
+    return roster[ROSTER_COLUMNS]
+
+
+def sheet_to_long(sheet):
+    '''To reshape a wide grade sheet into one row for each non-empty score.
+
+        The sheet has 学号, 姓名, 班号 and then pairs of (成绩, 学分) columns, the name of the course is the
+        header of its score column.
+
+        Returns:
+            rows            # 成绩所在的行号，按行号排序
+            course_names    # 课程名称
+            course_credits  # 课程学分
+            student_grades  # 学生成绩
+    '''
+    values = np.asarray(sheet, dtype=object)
+    course_credits = values[:, 4::2]
+    # 最后一列如果没有对应的学分列则忽略
+    n_course = course_credits.shape[1]
+    student_grades = values[:, 3:3 + 2 * n_course:2]
+    course_names = np.asarray(sheet.columns, dtype=object)[3:3 + 2 * n_course:2]
+    # 如果为nan，说明数据为空，不读入
+    rows, cols = np.nonzero(pd.notna(student_grades))
+    return rows, course_names[cols], course_credits[rows, cols], student_grades[rows, cols]
+
+
+########################################
+# Models
+########################################
+class Config():
+    ''' Some important configures.
+
+        Arguments:
+            cal_gpa         # 是否计算gpa， 会自动产生gpa排名
+            cal_caa         # 是否计算学积分，会自动产生学积分排名
+            sort_by_gpa     # 是否按照GPA排序
+            sort_by_caa     # 是否按照学积分排序
+            output_path     # 选择输出位置
+            data_path       # 选择输入文件夹
+            file_name       # 输出文件名
+            cache_path      # 解析结果缓存文件夹，为None时不使用缓存
+            cache_max_size  # 缓存文件夹的最大容量（字节）
+            cache_max_age   # 缓存文件的最长保留时间（天）
+            workers         # 并行解析文件的进程数，为None时使用CPU核数
+            grade_scale     # 成绩与绩点的对应表， class GradeScale 的实例，为None时使用 DEFAULT_GRADE_SCALE
+            rank_method     # 并列时的排名方式，"min"、"dense" 或 "ordinal"
+            top_k           # 按GPA或学积分排序时只保留前top_k名，为None时保留全部
+            export_format   # 导出格式，"xlsx"、"csv" 或 "parquet"
+            streaming       # 导出xlsx时是否逐行写入，内存占用不随表格大小增长
+            profile         # 是否用 cProfile 记录读取和查询的函数耗时
+            report_path     # 每次读取和查询后把耗时统计写入这个json文件，为None时只写入日志
+            metric_cache_size   # 缓存的 GPA、学积分结果的最大个数，为0时不缓存
+            query_cache_size    # 缓存的查询结果的最大容量（字节），为0时不缓存
+
+    '''
+
+    def __init__(self, cal_gpa=True, cal_caa=True, sort_by_gpa=False, sort_by_caa=False, sort_by_major=False,
+                 sort_by_source=False, student_list_path="../student_list/", output_path="../output/", file_name="test",
+                 data_path="../data/", cache_path="../cache/", cache_max_size=512 * 1024 * 1024, cache_max_age=90,
+                 workers=None, grade_scale=None, rank_method="min", top_k=None, export_format="xlsx",
+                 streaming=False, profile=False, report_path=None, metric_cache_size=65536,
+                 query_cache_size=64 * 1024 * 1024):
+        self.cal_gpa = cal_gpa
+        self.cal_caa = cal_caa
+        self.sort_by_gpa = sort_by_gpa
+        self.sort_by_caa = sort_by_caa
+        self.sort_by_major = sort_by_major
+        self.sort_by_source = sort_by_source
+        self.output_path = output_path
+        self.data_path = data_path
+        self.file_name = file_name
+        self.student_list_path = student_list_path
+        self.cache_path = cache_path
+        self.cache_max_size = cache_max_size
+        self.cache_max_age = cache_max_age
+        self.workers = workers
+        if grade_scale is None:
+            grade_scale = DEFAULT_GRADE_SCALE
+        self.grade_scale = grade_scale
+        self.rank_method = rank_method
+        self.top_k = top_k
+        self.export_format = export_format
+        self.streaming = streaming
+        self.profile = profile
+        self.report_path = report_path
+        self.metric_cache_size = metric_cache_size
+        self.query_cache_size = query_cache_size
+        if not self.file_name.split('.')[-1] == 'xlsx':
+            self.file_name += '.xlsx'
+
+    def show(self):
+        print("=========configures============")
+        print("Calculate GPA:", self.cal_gpa)
+        print("Calculate CAA:", self.cal_caa)
+        print("Sort by GPA:", self.sort_by_gpa)
+        print("Sort by CAA:", self.sort_by_caa)
+        print("Sort by major:", self.sort_by_major)
+        print("Sort by source:", self.sort_by_source)
+        print()
+        print("Student list path", self.student_list_path)
+        print("Data path:", self.data_path)
+        print("Output path:", self.output_path)
+        print("Cache path:", self.cache_path)
+        print("===============================")
+
+    def set_data_path(self, data_path):
+        self.data_path = data_path
+
+    def set_cache_path(self, cache_path):
+        self.cache_path = cache_path
+
+    def set_export_format(self, export_format, streaming=False):
+        self.export_format = export_format
+        self.streaming = streaming
+
+    def set_profile(self, profile, report_path=None):
+        self.profile = profile
+        self.report_path = report_path
+
+    def set_rank_method(self, rank_method):
+        self.rank_method = rank_method
+
+    def set_top_k(self, top_k):
+        self.top_k = top_k
+
+    def set_grade_scale(self, grade_scale):
+        self.grade_scale = grade_scale
+
+    def set_workers(self, workers):
+        self.workers = workers
+
+    def set_output_path(self, output_path):
+        self.output_path = output_path
+
+    def set_student_list_path(self, student_list_path):
+        self.student_list_path = student_list_path
+
+    def set_cal_gpa(self, cal_gpa):
+        self.cal_gpa = cal_gpa
+
+    def set_cal_caa(self, cal_caa):
+        self.cal_caa = cal_caa
+
+    def set_file_name(self, file_name):
+        self.file_name = file_name
+        if not self.file_name.split('.')[-1] == 'xlsx':
+            self.file_name += '.xlsx'
+
+
+class Semester:
+    ''' A semester contains the year of start, the year of end and its number.
+
+        Arguments:
+                        # 以2015-2016-2 为例
+            year_start  # 2015
+            year_end    # 2016
+            number      # 2
+
+        Every semester has only one instance, Semester("2015", "2016", "2") and Semester(2015, 2016, 2)
+        return the same object, the years and the number are stored as str.
+    '''
+
+    __slots__ = ("year_start", "year_end", "number", "code")
+    # 已经创建的学期
+    instances = {}
+
+    def __new__(cls, year_start, year_end, number):
+        key = (str(year_start), str(year_end), str(number))
+        semester = cls.instances.get(key)
+        if semester is None:
+            semester = super().__new__(cls)
+            semester.year_start, semester.year_end, semester.number = key
+            if not semester.varify():
+                logger.warning("The format of semester is wrong!")
+            semester.code = int(key[0]) * 10 + int(key[2])
+            semester = cls.instances.setdefault(key, semester)
+        return semester
+
+    def __getnewargs__(self):
+        return self.year_start, self.year_end, self.number
+
+    def varify(self):
+        if int(self.year_start) == int(self.year_end) - 1 and 1 <= int(self.number) <= 2:
+            return True
+        else:
+            return False
+
+    def equals(self, other_semester):
+        # 年份可能是字符串也可能是整数，按编号比较
+        return self.to_code() == other_semester.to_code()
+
+    # 学期可以作为字典的键，并且可以排序
+    def __eq__(self, other):
+        if not isinstance(other, Semester):
+            return NotImplemented
+        return self.code == other.code
+
+    def __lt__(self, other):
+        if not isinstance(other, Semester):
+            return NotImplemented
+        return self.code < other.code
+
+    def __hash__(self):
+        return hash(self.code)
+
+    def __repr__(self):
+        return "Semester(" + self.to_str() + ")"
+
+    def to_str(self):
+        return self.year_start + '-' + self.year_end + '-' + self.number
+
+    def to_code(self):
+        '''To get the integer code of the semester, 2015-2016-2 is 20152.'''
+        return self.code
+
+
+def semester_from_code(code):
+    '''To get the Semester of an integer code, 20152 is 2015-2016-2.'''
+    code = int(code)
+    return Semester(str(code // 10), str(code // 10 + 1), str(code % 10))
+
+
+def semester_from_str(text):
+    '''To get the Semester of a string like 2015-2016-2.'''
+    parts = text.strip().split('-')
+    if len(parts) != 3:
+        raise ValueError("The format of semester is wrong: " + text)
+    semester = Semester(parts[0], parts[1], parts[2])
+    if not semester.varify():
+        raise ValueError("The format of semester is wrong: " + text)
+    return semester
+
+
+def semester_range(first, last):
+    '''To get all the semesters from first to last, both included.'''
+    semesters = []
+    code = first.to_code()
+    while code <= last.to_code():
+        semesters.append(semester_from_code(code))
+        # 第一学期之后是同一学年的第二学期，第二学期之后是下一学年的第一学期
+        code = code + 1 if code % 10 == 1 else code + 9
+    return semesters
+
+
+class Student:
+    ''' Student infomation.
+
+        Attributes：
+            student_id:     # 学号， "51526****".
+            student_name:   # 中文姓名，"张三".
+            class_id:       # 班级号，"F1526002".
+            store:          # 成绩数据， class GradeStore 的实例，学期成绩信息从中读取
+    '''
+
+    __slots__ = ("student_id", "student_name", "student_year", "class_id", "major", "source", "msg", "store")
+
+    def __init__(self, student_name, student_id, student_year, class_id, major, source, store=None):
+        self.student_id = student_id
+        self.student_name = student_name
+        # 同一年级、班级、专业的学生共用一个字符串
+        self.student_year = intern_str(student_year)
+        self.class_id = intern_str(class_id)
+        self.major = intern_str(major)
+        self.source = intern_str(source)
+        # 大部分学生没有提示信息，不为每个学生建立list
+        self.msg = ()
+
+        if store is None:
+            store = GradeStore()
+        self.store = store
+
+    def clean_msg(self):
+        self.msg = ()
+
+    def get_msg(self):
+        return list(self.msg)
+
+    def add_msg(self, m):
+        if m not in self.msg:
+            self.msg = self.msg + (m,)
+
+    def get_student_name(self):
+        return self.student_name
+
+    def get_student_id(self):
+        return self.student_id
+
+    def get_class_id(self):
+        return self.class_id
+
+    def get_key(self):
+        '''To get the key of the student in GradeStore and StudentRegistry.'''
+        return normalize_id(self.student_id)
+
+    def get_grades_data(self):
+        return self.store.get_grades_data(self.get_key())
+
+    def get_major(self):
+        return self.major
+
+    def get_source(self):
+        return self.source
+
+    def get_student_year(self):
+        return self.student_year
+
+    def add_grades_data(self, grades_data):
+        '''To add a grades_data.'''
+        self.store.add_grades_data(self.get_key(), grades_data)
+
+    def find_grades_data(self, semester):
+        '''To find the grades_data for a given semester.'''
+        return self.store.find_grades_data(self.get_key(), semester)
+
+    def find_grades_data_range(self, first, last):
+        '''To find the grades_data of the semesters from first to last, both included.'''
+        return self.store.get_grades_data(self.get_key(), first, last)
+
+    def show(self):
+        '''To show the student's all grades information.'''
+        print(self.student_id, self.student_name, self.class_id)
+        for gd in self.get_grades_data():
+            gd.show()
+
+    def calculate_sums(self, semesters, grade_scale=DEFAULT_GRADE_SCALE):
+        '''To sum the credit weighted grade points and scores over all the semesters, as GradeStore.sum_grades.
+
+            Returns:
+                (sum(credit * grade point), sum(credit * score), sum(credit))，P和空成绩不计入
+        '''
+        key = self.get_key()
+        enrolled = self.store.find_enrolled([key], semesters)[0]
+        for semester, found in zip(semesters, enrolled.tolist()):
+            if not found:
+                logger.info("没有找到 %s %s %s 学期成绩", self.class_id, self.student_name, semester.to_str())
+                self.add_msg("没有找到 {} {} {} 学期成绩".format(self.class_id, self.student_name, semester.to_str()))
+        point, score, credit = self.store.sum_array([key], semesters, grade_scale)[0]
+        return point, score, credit
+
+    def calculate_gpa(self, semesters, return_credit=False, grade_scale=DEFAULT_GRADE_SCALE):
+        '''To calculate the student's GPA, sum(credit * grade point) / sum(credit) over all the semesters.'''
+        point, _, credit = self.calculate_sums(semesters, grade_scale)
+        gpa_average = point / credit
+        if return_credit:
+            return gpa_average, credit
+        else:
+            return gpa_average
+
+    def calculate_caa(self, semesters, return_credit=False):
+        '''To calculate the student's cumulative academic average, sum(credit * score) / sum(credit).'''
+        _, score, credit = self.calculate_sums(semesters)
+        caa_average = score / credit
+        if return_credit:
+            return caa_average, credit
+        else:
+            return caa_average
+
+
+def intern_str(value):
+    '''To get the shared copy of a str, the values which are not str are returned as they are.'''
+    if type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+def normalize_id(student_id):
+    '''To convert a student_id read as int, float or str into the same str.'''
+    if isinstance(student_id, (float, np.floating)) and float(student_id).is_integer():
+        student_id = int(student_id)
+    return str(student_id).strip()
+
+
+def year_key(student_year):
+    '''To get the year of a student_year like "2015级".'''
+    return str(student_year)[:4]
+
+
+class StudentRegistry:
+    ''' All the students, indexed on student_id, student_name, class_id, student_year, major and source.
+
+        The indexes are kept up to date when a student is added or removed, queries are intersections of the
+        indexes instead of scans over all the students.
+
+    '''
+
+    index_names = ("student_name", "class_id", "student_year", "major", "source")
+
+    def __init__(self):
+        # 学号（Student.get_key）-> Student
+        self.students = {}
+        # 每个学生加入的顺序，用于结果排序
+        self.orders = {}
+        self.next_order = 0
+        # 索引名 -> {值 -> 学号的set}
+        self.indexes = {name: {} for name in self.index_names}
+
+    def index_values(self, student):
+        return {"student_name": student.get_student_name(),
+                "class_id": student.get_class_id(),
+                "student_year": year_key(student.get_student_year()),
+                "major": student.get_major(),
+                "source": student.get_source()}
+
+    def add(self, student):
+        '''To add a student, return False if a student with the same student_id is replaced.'''
+        key = student.get_key()
+        replaced = key in self.students
+        if replaced:
+            self.remove(key)
+        self.students[key] = student
+        self.orders[key] = self.next_order
+        self.next_order += 1
+        for name, value in self.index_values(student).items():
+            self.indexes[name].setdefault(value, set()).add(key)
+        return not replaced
+
+    def remove(self, student_id):
+        key = normalize_id(student_id)
+        student = self.students.pop(key, None)
+        if student is None:
+            return
+        del self.orders[key]
+        for name, value in self.index_values(student).items():
+            keys = self.indexes[name][value]
+            keys.discard(key)
+            if len(keys) == 0:
+                del self.indexes[name][value]
+
+    def get(self, student_id):
+        return self.students.get(normalize_id(student_id))
+
+    def __getitem__(self, student_id):
+        return self.students[normalize_id(student_id)]
+
+    def __contains__(self, student_id):
+        return normalize_id(student_id) in self.students
+
+    def __len__(self):
+        return len(self.students)
+
+    def items(self):
+        return self.students.items()
+
+    def values(self):
+        return self.students.values()
+
+    def sorted_students(self, keys):
+        return [self.students[key] for key in sorted(keys, key=self.orders.__getitem__)]
+
+    def find_keys(self, **conditions):
+        '''To get the set of keys of the students matching all the conditions, None if there is no condition.'''
+        result = None
+        # 从最小的集合开始求交集
+        candidates = []
+        for name, value in conditions.items():
+            if value is None:
+                continue
+            if name == "student_id":
+                key = normalize_id(value)
+                candidates.append({key} if key in self.students else set())
+            else:
+                if name == "student_year":
+                    value = year_key(value)
+                candidates.append(self.indexes[name].get(value, set()))
+        for keys in sorted(candidates, key=len):
+            result = set(keys) if result is None else result & keys
+        return result
+
+    def query(self, student_year=None, class_id=None, student_id=None, student_name=None, major=None, source=None):
+        '''To find the students matching all the given conditions, in the order they were added.'''
+        keys = self.find_keys(student_year=student_year, class_id=class_id, student_id=student_id,
+                              student_name=student_name, major=major, source=source)
+        if keys is None:
+            return list(self.students.values())
+        return self.sorted_students(keys)
+
+
+class Grades_data:
+    '''Grade information for one semester, usually a view of the rows in GradeStore.
+
+        Attributes：
+            semester        #学期， class Semester 的实例
+            course_names    #课程名称的数组
+            course_credits  #课程学分的数组
+            scores          #成绩的数组，P 为 nan
+            passed          #成绩是否为 P 的数组
+
+    '''
+
+    __slots__ = ("semester", "course_names", "course_credits", "scores", "passed")
+
+    def __init__(self, semester, grades=None, course_names=(), course_credits=(), scores=(), passed=()):
+        self.semester = semester
+        if grades is not None:
+            course_names = [grade.get_course_name() for grade in grades]
+            course_credits = to_float([grade.get_course_credit() for grade in grades])
+            scores, passed = split_grades([grade.get_student_grade() for grade in grades])
+        self.course_names = np.asarray(course_names, dtype=object)
+        self.course_credits = np.asarray(course_credits, dtype=float)
+        self.scores = np.asarray(scores, dtype=float)
+        self.passed = np.asarray(passed, dtype=bool)
+
+    def get_semester(self):
+        return self.semester
+
+    def get_grades(self):
+        # tolist() 得到 python 的 float，比 numpy.float64 小
+        student_grades = ['P' if passed else score for score, passed in zip(self.scores.tolist(), self.passed.tolist())]
+        return [Grade(course_name, course_credit, student_grade) for course_name, course_credit, student_grade
+                in zip(self.course_names.tolist(), self.course_credits.tolist(), student_grades)]
+
+    def show(self):
+        print(self.semester.to_str())
+        for g in self.get_grades():
+            g.show()
+
+    def numeric_grades(self):
+        '''To get the scores and the credits of the courses which are not graded as P.'''
+        mask = ~self.passed & ~np.isnan(self.scores) & ~np.isnan(self.course_credits)
+        return self.scores[mask], self.course_credits[mask]
+
+    def calculate_gpa(self, return_credit=False, grade_scale=DEFAULT_GRADE_SCALE):
+        scores, credits = self.numeric_grades()
+        scores = grade_scale.map(scores)
+        gpa = np.dot(scores.T, credits) / credits.sum()
+        if return_credit:
+            return gpa, credits.sum()
+        else:
+            return gpa
+
+    def calculate_caa(self, return_credit=False):
+        scores, credits = self.numeric_grades()
+        acc = np.dot(scores.T, credits) / credits.sum()
+        if return_credit:
+            return acc, credits.sum()
+        else:
+            return acc
+
+
+class Grade:
+    ''' Grade for one course
+
+    Arguments:
+        course_name     # 课程名称
+        course_credit   # 课程绩点
+        student_grade   # 学生成绩
+
+    '''
+
+    __slots__ = ("course_name", "course_credit", "student_grade")
+
+    def __init__(self, course_name, course_credit, student_grade):
+        self.course_name = intern_str(course_name)
+        self.course_credit = course_credit
+        self.student_grade = student_grade
+
+    def get_course_name(self):
+        return self.course_name
+
+    def get_course_credit(self):
+        return self.course_credit
+
+    def get_student_grade(self):
+        return self.student_grade
+
+    def show(self):
+        print(self.course_name, self.course_credit, self.student_grade)
+
+
+def to_float(values):
+    '''To convert the values into a float array, the values which are not numbers become nan.'''
+    return pd.to_numeric(pd.Series(np.asarray(values, dtype=object)), errors='coerce').to_numpy(dtype=float)
+
+
+def split_grades(student_grades):
+    '''To split the grades into the numeric scores and the flags of P (pass).'''
+    student_grades = np.asarray(student_grades, dtype=object)
+    passed = student_grades == 'P'
+    scores = to_float(student_grades)
+    return scores, passed
+
+
+class GradeStore:
+    ''' Columnar storage of all the grades, Student and Grades_data are views of it.
+
+        Attributes:
+            frame           # pandas.DataFrame，每门课的成绩一行，按 student, semester 排序
+                            #   student     学生编号，对应 student_keys
+                            #   semester    学期编号，2015-2016-1 为 20151
+                            #   course      课程编号，对应 course_names
+                            #   credit      学分
+                            #   score       成绩，P 为 nan
+                            #   passed      成绩是否为 P
+            enrolments      # pandas.DataFrame，每个学生有成绩记录的学期 (student, semester)
+            student_keys    # 学生编号对应的学号，见 Student.get_key
+            course_names    # 课程编号对应的课程名称
+            version         # 每次成绩变化时加一
+            metric_cache    # 每个学生在一组学期中的成绩总和的LRU缓存，见 sum_array，最近使用的在最后
+                            #   键为 (学号, 学期编号tuple, 指标, 绩点表的key)，某个学生的成绩变化时只删除这个学生的缓存
+
+    '''
+
+    columns = ["student", "semester", "course", "credit", "score", "passed"]
+
+    def __init__(self, metric_cache_size=65536):
+        self.student_keys = []
+        self.student_codes = {}
+        # 课程目录，所有学生共用，成绩中只保存课程编号
+        self.course_names = []
+        self.course_codes = {}
+        # 每个来源文件的成绩和学期记录，来源为None的是手动添加的成绩
+        self.chunks = {}
+        self.enrolment_chunks = {}
+        self.version = 0
+        self.frame = None
+        self.enrolments = None
+        self.cubes = {}
+        self.metric_cache = OrderedDict()
+        self.metric_cache_size = metric_cache_size
+        # 每个学生在 metric_cache 中的键
+        self.metric_keys = {}
+        # 没有成绩的学生 GPA 为 nan，不显示除以0的警告
+        np.seterr(divide='ignore', invalid='ignore')
+
+    def encode(self, values, keys, codes):
+        '''To convert the values into integer codes, new values are appended to keys.'''
+        inverse, uniques = pd.factorize(np.asarray(values, dtype=object))
+        unique_codes = np.empty(len(uniques), dtype=np.int64)
+        for i, value in enumerate(uniques):
+            code = codes.get(value)
+            if code is None:
+                value = intern_str(value)
+                code = len(keys)
+                codes[value] = code
+                keys.append(value)
+            unique_codes[i] = code
+        return unique_codes[inverse]
+
+    def make_chunk(self, semester, student_keys, course_names, course_credits, student_grades):
+        scores, passed = split_grades(student_grades)
+        return pd.DataFrame({"student": self.encode(student_keys, self.student_keys, self.student_codes),
+                             "semester": np.full(len(scores), semester.to_code(), dtype=np.int64),
+                             "course": self.encode(course_names, self.course_names, self.course_codes),
+                             "credit": to_float(course_credits),
+                             "score": scores,
+                             "passed": passed}, columns=self.columns)
+
+    def make_enrolment(self, semester, student_keys):
+        students = self.encode(student_keys, self.student_keys, self.student_codes)
+        return pd.DataFrame({"student": students,
+                             "semester": np.full(len(students), semester.to_code(), dtype=np.int64)})
+
+    def add(self, source, semester, student_keys, course_names, course_credits, student_grades, enrolled):
+        '''To add the grades read from a source file, the old grades of the source are replaced.
+
+            Arguments:
+                student_keys, course_names, course_credits, student_grades  # 每门课的成绩一个元素
+                enrolled                                                    # 这个学期有成绩记录的学生
+
+            Returns:
+                the number of the grades which are neither a number nor P
+        '''
+        # 被替换的旧成绩中的学生也需要重新计算
+        if source in self.chunks:
+            self.invalidate_codes(self.chunks[source]["student"].to_numpy())
+            self.invalidate_codes(self.enrolment_chunks[source]["student"].to_numpy())
+        chunk = self.make_chunk(semester, student_keys, course_names, course_credits, student_grades)
+        self.chunks[source] = chunk
+        self.enrolment_chunks[source] = self.make_enrolment(semester, enrolled)
+        self.invalidate(student_keys)
+        self.invalidate(enrolled)
+        self.touch()
+        return int((np.isnan(chunk["score"].to_numpy()) & ~chunk["passed"].to_numpy()).sum())
+
+    def add_grades_data(self, student_key, grades_data):
+        '''To add a Grades_data of a student which is not read from a file.'''
+        n = len(grades_data.course_names)
+        student_grades = grades_data.scores.astype(object)
+        student_grades[grades_data.passed] = 'P'
+        chunk = self.make_chunk(grades_data.get_semester(), [student_key] * n, grades_data.course_names,
+                                grades_data.course_credits, student_grades)
+        enrolment = self.make_enrolment(grades_data.get_semester(), [student_key])
+        if None in self.chunks:
+            chunk = pd.concat([self.chunks[None], chunk], ignore_index=True)
+            enrolment = pd.concat([self.enrolment_chunks[None], enrolment], ignore_index=True)
+        self.chunks[None] = chunk
+        self.enrolment_chunks[None] = enrolment
+        self.invalidate([student_key])
+        self.touch()
+
+    def remove(self, source):
+        '''To remove all the grades read from a source file.'''
+        if source in self.chunks:
+            self.invalidate_codes(self.chunks[source]["student"].to_numpy())
+            self.invalidate_codes(self.enrolment_chunks[source]["student"].to_numpy())
+            del self.chunks[source]
+            del self.enrolment_chunks[source]
+            self.touch()
+
+    def get_metric(self, key):
+        '''To get a cached metric, None if it is not cached. The first element of key is the student key.'''
+        value = self.metric_cache.get(key)
+        if value is not None:
+            self.metric_cache.move_to_end(key)
+        return value
+
+    def put_metric(self, key, value):
+        '''To cache a metric, the least recently used ones are dropped when the cache is full.'''
+        if self.metric_cache_size <= 0:
+            return
+        self.metric_cache[key] = value
+        self.metric_cache.move_to_end(key)
+        self.metric_keys.setdefault(key[0], set()).add(key)
+        while len(self.metric_cache) > self.metric_cache_size:
+            old_key, _ = self.metric_cache.popitem(last=False)
+            keys = self.metric_keys[old_key[0]]
+            keys.discard(old_key)
+            if not keys:
+                del self.metric_keys[old_key[0]]
+
+    def invalidate(self, student_keys):
+        '''To drop the cached metrics of the students whose grades have changed.'''
+        if not self.metric_keys:
+            return
+        for student_key in set(student_keys):
+            for key in self.metric_keys.pop(student_key, ()):
+                del self.metric_cache[key]
+
+    def invalidate_codes(self, codes):
+        '''To drop the cached metrics of the students given by their codes in the frame.'''
+        if self.metric_keys:
+            self.invalidate([self.student_keys[code] for code in np.unique(codes).tolist()])
+
+    def touch(self):
+        self.version += 1
+        self.frame = None
+        self.enrolments = None
+        self.cubes = {}
+
+    def consolidate(self):
+        '''To merge the chunks into one frame sorted by student and semester.'''
+        if self.frame is not None:
+            return
+        if len(self.chunks) > 0:
+            frame = pd.concat(list(self.chunks.values()), ignore_index=True)
+            enrolments = pd.concat(list(self.enrolment_chunks.values()), ignore_index=True)
+        else:
+            frame = pd.DataFrame({column: [] for column in self.columns})
+            enrolments = pd.DataFrame({"student": [], "semester": []})
+        frame = frame.astype({"student": np.int64, "semester": np.int64, "course": np.int64,
+                              "credit": float, "score": float, "passed": bool})
+        self.frame = frame.sort_values(["student", "semester"], kind="mergesort", ignore_index=True)
+        enrolments = enrolments.astype(np.int64).drop_duplicates()
+        self.enrolments = enrolments.sort_values(["student", "semester"], ignore_index=True)
+
+        # 每个学生在 frame 中是连续的一段
+        codes = np.arange(len(self.student_keys))
+        students = self.frame["student"].to_numpy()
+        self.starts = np.searchsorted(students, codes, side='left')
+        self.stops = np.searchsorted(students, codes, side='right')
+        enrolled = self.enrolments["student"].to_numpy()
+        self.enrolment_starts = np.searchsorted(enrolled, codes, side='left')
+        self.enrolment_stops = np.searchsorted(enrolled, codes, side='right')
+        self.course_name_array = np.asarray(self.course_names, dtype=object)
+        self.semester_indexes = {}
+
+    def get_frame(self):
+        self.consolidate()
+        return self.frame
+
+    def get_enrolments(self):
+        self.consolidate()
+        return self.enrolments
+
+    def view(self, semester_code, start, stop):
+        '''To get the Grades_data of the rows [start, stop) of the frame.'''
+        frame = self.frame
+        return Grades_data(semester_from_code(semester_code),
+                           course_names=self.course_name_array[frame["course"].to_numpy()[start:stop]],
+                           course_credits=frame["credit"].to_numpy()[start:stop],
+                           scores=frame["score"].to_numpy()[start:stop],
+                           passed=frame["passed"].to_numpy()[start:stop])
+
+    def find_codes(self, student_keys):
+        '''To get the codes of the students, -1 for the students without any grade.'''
+        return np.asarray([self.student_codes.get(key, -1) for key in student_keys], dtype=np.int64)
+
+    def get_cube(self, grade_scale=DEFAULT_GRADE_SCALE):
+        '''To get the SemesterCube of the current grades, it is built once for each grade scale.'''
+        self.consolidate()
+        key = grade_scale.key()
+        if key not in self.cubes:
+            self.cubes[key] = SemesterCube(self.frame, self.enrolments, len(self.student_keys), grade_scale)
+        return self.cubes[key]
+
+    def sum_grades(self, student_keys, semesters, grade_scale=DEFAULT_GRADE_SCALE):
+        '''To sum the credit weighted grade points and scores of the students over the semesters.
+
+            Returns:
+                pandas.DataFrame in the order of student_keys, columns:
+                    point   # sum(credit * grade point)
+                    score   # sum(credit * score)
+                    credit  # sum(credit)，P和空成绩不计入
+        '''
+        sums = self.sum_array(student_keys, semesters, grade_scale)
+        return pd.DataFrame({"point": sums[:, 0], "score": sums[:, 1], "credit": sums[:, 2]})
+
+    def sum_array(self, student_keys, semesters, grade_scale=DEFAULT_GRADE_SCALE):
+        '''To get the sums of sum_grades as an array of shape (len(student_keys), 3), the results are cached.'''
+        semester_codes = tuple(semester.to_code() for semester in semesters)
+        scale_key = grade_scale.key()
+        keys = [(student_key, semester_codes, "sums", scale_key) for student_key in student_keys]
+        sums = np.empty((len(keys), 3))
+        missing = []
+        for i, key in enumerate(keys):
+            value = self.get_metric(key)
+            if value is None:
+                missing.append(i)
+            else:
+                sums[i] = value
+        # 只计算没有缓存的学生
+        if len(missing) > 0:
+            point, score, credit = self.get_cube(grade_scale).sum(
+                self.find_codes([student_keys[i] for i in missing]), semesters)
+            sums[missing, 0] = point
+            sums[missing, 1] = score
+            sums[missing, 2] = credit
+            for i, value in zip(missing, zip(point.tolist(), score.tolist(), credit.tolist())):
+                self.put_metric(keys[i], value)
+        return sums
+
+    def find_enrolled(self, student_keys, semesters):
+        '''To check whether the students have grades in the semesters.
+
+            Returns:
+                bool array of shape (len(student_keys), len(semesters))
+        '''
+        return self.get_cube().find_enrolled(self.find_codes(student_keys), semesters)
+
+    def get_semester_index(self, student_key):
+        '''To get the semesters of a student, as a dict {semester code: (start, stop) in frame}.
+
+            The dict is built when the student is first visited after a change, its keys are in order.
+        '''
+        code = self.student_codes.get(student_key)
+        if code is None:
+            return {}
+        self.consolidate()
+        if code in self.semester_indexes:
+            return self.semester_indexes[code]
+        start, stop = self.starts[code], self.stops[code]
+        semesters = self.frame["semester"].to_numpy()[start:stop]
+        enrolled = self.enrolments["semester"].to_numpy()[self.enrolment_starts[code]:self.enrolment_stops[code]]
+        los = start + np.searchsorted(semesters, enrolled, side='left')
+        his = start + np.searchsorted(semesters, enrolled, side='right')
+        index = {}
+        for semester_code, lo, hi in zip(enrolled.tolist(), los.tolist(), his.tolist()):
+            index[semester_code] = (lo, hi)
+        self.semester_indexes[code] = index
+        return index
+
+    def find_grades_data(self, student_key, semester):
+        '''To get the Grades_data of a student in a semester, None if there is no record.'''
+        semester_code = semester.to_code()
+        bounds = self.get_semester_index(student_key).get(semester_code)
+        if bounds is None:
+            return None
+        return self.view(semester_code, bounds[0], bounds[1])
+
+    def get_grades_data(self, student_key, first=None, last=None):
+        '''To get the Grades_data of every semester of a student, or only of the semesters from first to last.'''
+        index = self.get_semester_index(student_key)
+        semester_codes = list(index)
+        lo, hi = 0, len(semester_codes)
+        if first is not None:
+            lo = bisect.bisect_left(semester_codes, first.to_code())
+        if last is not None:
+            hi = bisect.bisect_right(semester_codes, last.to_code())
+        return [self.view(semester_code, index[semester_code][0], index[semester_code][1])
+                for semester_code in semester_codes[lo:hi]]
+
+
+# 学分、绩点和成绩的和保留的小数位数
+SUM_DECIMALS = 9
+
+
+class SemesterCube:
+    ''' Sums of the grades of every (student, semester), kept as prefix sums along the semester axis.
+
+        The sums over any contiguous range of semesters is the difference of two columns, over other sets of
+        semesters it is the sum of the selected columns.
+
+        Attributes:
+            semester_codes  # 有成绩记录的学期编号，递增
+            point           # shape (学生数, 学期数 + 1)，第j列为前j个学期的 sum(credit * grade point)
+            score           # 同上，sum(credit * score)
+            credit          # 同上，sum(credit)，P和空成绩不计入
+            enrolled        # 同上，有成绩记录的学期数
+
+    '''
+
+    def __init__(self, frame, enrolments, n_students, grade_scale):
+        self.semester_codes = np.union1d(enrolments["semester"].to_numpy(), frame["semester"].to_numpy())
+        n_semesters = len(self.semester_codes)
+        size = n_students * n_semesters
+
+        credits = frame["credit"].to_numpy()
+        scores = frame["score"].to_numpy()
+        mask = ~frame["passed"].to_numpy() & ~np.isnan(scores) & ~np.isnan(credits)
+        credits, scores = credits[mask], scores[mask]
+        cells = (frame["student"].to_numpy()[mask] * n_semesters +
+                 np.searchsorted(self.semester_codes, frame["semester"].to_numpy()[mask]))
+        enrolled_cells = (enrolments["student"].to_numpy() * n_semesters +
+                          np.searchsorted(self.semester_codes, enrolments["semester"].to_numpy()))
+
+        self.point = self.prefix_sum(np.bincount(cells, weights=credits * grade_scale.map(scores), minlength=size),
+                                     n_students, n_semesters)
+        self.score = self.prefix_sum(np.bincount(cells, weights=credits * scores, minlength=size),
+                                     n_students, n_semesters)
+        self.credit = self.prefix_sum(np.bincount(cells, weights=credits, minlength=size), n_students, n_semesters)
+        self.enrolled = self.prefix_sum(np.bincount(enrolled_cells, minlength=size), n_students, n_semesters)
+
+    def prefix_sum(self, values, n_students, n_semesters):
+        result = np.zeros((n_students, n_semesters + 1))
+        np.cumsum(values.reshape(n_students, n_semesters), axis=1, out=result[:, 1:])
+        return result
+
+    def select(self, array, student_codes, semesters):
+        '''To sum the array over the semesters for the students, 0 for the code -1.'''
+        rows = np.maximum(student_codes, 0)
+        semester_codes = [semester.to_code() for semester in semesters]
+        if len(semester_codes) == 0 or len(array) == 0:
+            return np.zeros(len(student_codes))
+        if semester_codes == [semester.to_code() for semester in semester_range(min(semesters), max(semesters))]:
+            # 连续的学期，两列相减
+            first = np.searchsorted(self.semester_codes, semester_codes[0], side='left')
+            last = np.searchsorted(self.semester_codes, semester_codes[-1], side='right')
+            result = array[rows, last] - array[rows, first]
+        else:
+            columns = self.find_columns(np.unique(semester_codes))
+            columns = columns[columns >= 0]
+            result = (array[rows[:, None], columns + 1] - array[rows[:, None], columns]).sum(axis=1)
+        return np.where(student_codes >= 0, result, 0.0)
+
+    def find_columns(self, semester_codes):
+        '''To get the columns of the semesters on the semester axis, -1 if there is no record of a semester.'''
+        semester_codes = np.asarray(semester_codes, dtype=np.int64)
+        columns = np.searchsorted(self.semester_codes, semester_codes)
+        found = columns < len(self.semester_codes)
+        found[found] = self.semester_codes[columns[found]] == semester_codes[found]
+        return np.where(found, columns, -1)
+
+    def sum(self, student_codes, semesters):
+        '''To get the (point, score, credit) sums of the students over the semesters.
+
+            The differences of the prefix sums carry rounding errors, the sums are rounded to SUM_DECIMALS so that
+            the equal sums stay equal and are ranked as ties.
+        '''
+        return (np.round(self.select(self.point, student_codes, semesters), SUM_DECIMALS),
+                np.round(self.select(self.score, student_codes, semesters), SUM_DECIMALS),
+                np.round(self.select(self.credit, student_codes, semesters), SUM_DECIMALS))
+
+    def find_enrolled(self, student_codes, semesters):
+        '''To get the bool array of shape (len(student_codes), len(semesters)), True if there is a record.'''
+        enrolled = np.zeros((len(student_codes), len(semesters)), dtype=bool)
+        known = student_codes >= 0
+        columns = self.find_columns([semester.to_code() for semester in semesters])
+        for j, column in enumerate(columns):
+            if column >= 0:
+                counts = self.enrolled[student_codes[known], column + 1] - self.enrolled[student_codes[known], column]
+                enrolled[known, j] = counts > 0
+        return enrolled
+
+
+########################################
+# Ranking
+########################################
+RANK_METHODS = {
+    "min": "min",  # 并列时取最小名次，1, 2, 2, 4
+    "dense": "dense",  # 并列时名次连续，1, 2, 2, 3
+    "ordinal": "first",  # 并列时按出现顺序，1, 2, 3, 4
+}
+
+
+def rank_values(values, method="min", groups=None):
+    '''To rank the values from the largest, nan is not ranked.
+
+        Arguments:
+            groups  # 与values等长的分组，不为None时在每组内分别排名
+
+        Returns:
+            pandas.Series of nullable integers (Int64) with the same index as values
+    '''
+    if method not in RANK_METHODS:
+        raise ValueError("Unknown rank method: " + str(method))
+    # 相同的 GPA 由不同的和相除得到时，最后几位可能不同
+    values = pd.Series(values).round(SUM_DECIMALS)
+    if groups is not None:
+        values = values.groupby(groups, sort=False)
+    return values.rank(method=RANK_METHODS[method], na_option='keep', ascending=False).astype("Int64")
+
+
+def excel_sheet_name(name):
+    '''To make a valid name of Excel sheet, which has at most 31 characters and none of []:*?/\\.'''
+    name = re.sub(r'[\[\]:*?/\\]', '_', str(name))
+    return name[:31]
+
+
+def top_k(df, column, k=None):
+    '''To get the k rows with the largest values of column, sorted from the largest.
+
+        The k rows are selected by np.argpartition, only they are sorted.
+    '''
+    values = df[column].to_numpy(dtype=float)
+    if k is not None and k < len(df):
+        # nan 排在最后
+        values = np.where(np.isnan(values), -np.inf, values)
+        df = df.iloc[np.argpartition(-values, k - 1)[:k]] if k > 0 else df.iloc[:0]
+    return df.sort_values(by=[column], ascending=False, kind='mergesort')
+
+
+########################################
+# Export
+########################################
+def export_path(file_path, group_name, n_groups, suffix):
+    '''To get the path of the file of a group, like test-IE信息工程.csv, or test.csv if there is only one group.'''
+    stem = os.path.splitext(file_path)[0]
+    if n_groups > 1:
+        stem += '-' + excel_sheet_name(group_name)
+    return stem + suffix
+
+
+def iter_rows(df, index=True):
+    '''To yield the rows of df as lists, the missing values become None.'''
+    for row in df.itertuples(index=index, name=None):
+        yield [None if pd.isna(value) else value for value in row]
+
+
+def write_xlsx_stream(file_path, groups):
+    '''To write the groups with a write-only openpyxl workbook, the rows are streamed to the file.'''
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    for group_name, df in groups.items():
+        sheet = workbook.create_sheet(title=excel_sheet_name(group_name))
+        # 与 DataFrame.to_excel 相同，第一列为 index
+        sheet.append([None] + list(df.columns))
+        for row in iter_rows(df):
+            sheet.append(row)
+    workbook.save(file_path)
+
+
+def write_csv(file_path, df):
+    # utf-8-sig 使Excel能正确识别中文
+    with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(df.columns)
+        for row in iter_rows(df, index=False):
+            writer.writerow(row)
+
+
+########################################
+# Instrumentation
+########################################
+class Instrument:
+    ''' Timers and counters of the stages of loading and querying.
+
+        Arguments:
+            profile     # 是否在各阶段运行时开启 cProfile
+
+        Stages: list, parse, roster, update, metrics, rank, export
+        Counters: files, cached_files, parsed_files, rows, grades, students, queries
+    '''
+
+    def __init__(self, profile=False):
+        self.stages = {}
+        self.counters = {}
+        self.profiler = None
+        if profile:
+            import cProfile
+            self.profiler = cProfile.Profile()
+        # 阶段可以嵌套，只在最外层开关 profiler
+        self.depth = 0
+
+    @contextmanager
+    def stage(self, name):
+        '''To time a stage, use as: with instrument.stage("parse"): ...'''
+        if self.profiler is not None and self.depth == 0:
+            self.profiler.enable()
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.depth -= 1
+            if self.profiler is not None and self.depth == 0:
+                self.profiler.disable()
+            record = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+            record["calls"] += 1
+            record["seconds"] += seconds
+            logger.debug("stage %s: %.3f s", name, seconds)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def reset(self):
+        self.stages = {}
+        self.counters = {}
+        if self.profiler is not None:
+            import cProfile
+            self.profiler = cProfile.Profile()
+
+    def profile_stats(self, limit=30):
+        '''To get the functions taking the most cumulative time as text, None if profile is off.'''
+        if self.profiler is None:
+            return None
+        import pstats
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def report(self):
+        return {"stages": {name: dict(record) for name, record in self.stages.items()},
+                "counters": dict(self.counters),
+                "profile": self.profile_stats()}
+
+    def write_report(self, file_path=None):
+        '''To write the report into the log, and into a json file if file_path is given.'''
+        report = self.report()
+        for name, record in report["stages"].items():
+            logger.info("%s: %d calls, %.3f s", name, record["calls"], record["seconds"])
+        for name, value in report["counters"].items():
+            logger.info("%s: %d", name, value)
+        if report["profile"] is not None:
+            logger.debug("%s", report["profile"])
+        if file_path is not None:
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+
+########################################
+# Query cache
+########################################
+class QueryCache:
+    ''' The results of the recent queries kept in memory, keyed by the query.
+
+        Arguments:
+            max_size    # 缓存的最大容量（字节），超出时删除最久未使用的结果
+
+        The entries are computed from one version of GradeStore, they are all dropped when the version changes.
+
+    '''
+
+    def __init__(self, max_size=64 * 1024 * 1024):
+        self.max_size = max_size
+        # {key: (value, size)}，最近使用的在最后
+        self.entries = OrderedDict()
+        self.size = 0
+        self.version = None
+
+    def check_version(self, version):
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def get(self, key, version):
+        '''To get a cached value, return None if it is not cached or the grades have changed.'''
+        self.check_version(version)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, version, value, size):
+        '''To store a value of size bytes, the values larger than max_size are not stored.'''
+        self.check_version(version)
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        if size > self.max_size:
+            return
+        self.entries[key] = (value, size)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, old_size) = self.entries.popitem(last=False)
+            self.size -= old_size
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+
+########################################
+# Controler
+########################################
+class QueryCancelled(Exception):
+    '''Raised by the progress function to stop a running load or query.'''
+    pass
+
+
+class Controler:
+    '''
+    控制类
+    '''
+
+    def __init__(self, config, progress=None):
+        self.msg = []
+        self.load_msg = []
+        self.config = config
+        self.data_path = self.config.data_path
+        self.student_list_path = self.config.student_list_path
+        self.progress = progress
+        self.saved_paths = []
+        # 各阶段的耗时和计数，见 get_report()
+        self.instrument = Instrument(self.config.profile)
+        self.sheet_cache = None
+        if self.config.cache_path is not None:
+            self.sheet_cache = SheetCache(self.config.cache_path, self.config.cache_max_size,
+                                          self.config.cache_max_age)
+        self.load()
+
+    def load(self):
+        '''To load all the files in data_path, the result stays in memory until the next reload.'''
+        self.msg = []
+        # 读取每个文件时的提示信息 {file_name: [msg]}，名单的提示信息的键为None
+        self.load_msgs = {}
+        # 每个文件的 (mtime, size, hash)
+        self.file_states = {}
+        # 每个文件解析后的sheet
+        self.sheets = {}
+        # 所有学生的成绩
+        self.grade_store = GradeStore(self.config.metric_cache_size)
+        # 最近查询的成绩表，成绩变化后失效
+        self.query_cache = QueryCache(self.config.query_cache_size)
+
+        self.file_list = []
+        self.data_list = []
+        self.studentyear_semester_dic = {}
+        self.student_dic = StudentRegistry()
+        # 每个名单文件的 (mtime, size, hash)，为None时需要重新读取名单
+        self.roster_states = None
+
+        self.load_students()
+        self.refresh()
+
+    def set_progress(self, progress):
+        '''To set the function progress(message, done, total) called during the long operations.
+
+            It can raise QueryCancelled to stop the operation.
+        '''
+        self.progress = progress
+
+    def report(self, message, done=0, total=0):
+        if self.progress is not None:
+            self.progress(message, done, total)
+
+    def refresh(self):
+        '''To parse only the new or changed files and retract the deleted ones, return True if anything changed.'''
+        self.report("检查成绩文件")
+        old_states = self.file_states
+        with self.instrument.stage("list"):
+            changed, removed = self.scan_changes()
+        self.instrument.count("files", len(changed))
+        try:
+            for file_name in removed + changed:
+                self.retract_file(file_name)
+            with self.instrument.stage("parse"):
+                self.read_files(changed)
+            with self.instrument.stage("update"):
+                self.update(changed)
+        except QueryCancelled:
+            # 下次读取时这些文件会被重新解析
+            self.file_states = old_states
+            self.index_files()
+            raise
+        self.index_files()
+        if self.sheet_cache is not None and len(changed) > 0:
+            self.sheet_cache.evict()
+        # 读取过程中的提示信息在每次查询时都需要保留
+        self.collect_load_msg()
+        self.msg = list(self.load_msg)
+        self.write_report()
+        return len(changed) > 0 or len(removed) > 0
+
+    def get_report(self):
+        '''To get the time of every stage and the counters since the Controler was created.'''
+        return self.instrument.report()
+
+    def write_report(self):
+        return self.instrument.write_report(self.config.report_path)
+
+    def list_files(self, path):
+        return [file_name for file_name in sorted(os.listdir(path)) if os.path.isfile(os.path.join(path, file_name))]
+
+    def list_rosters(self):
+        # 跳过Excel打开时产生的临时文件
+        return [file_name for file_name in self.list_files(self.student_list_path)
+                if not file_name.startswith("~$") and not file_name.startswith(".")]
+
+    def scan_states(self, path, file_names, old_states):
+        '''To get the (mtime, size, hash) of the files, the hash is computed only if mtime or size has changed.'''
+        states = {}
+        for file_name in file_names:
+            file_path = os.path.join(path, file_name)
+            stat = os.stat(file_path)
+            old_state = old_states.get(file_name)
+            if old_state is not None and old_state[0] == stat.st_mtime and old_state[1] == stat.st_size:
+                states[file_name] = old_state
+            else:
+                states[file_name] = (stat.st_mtime, stat.st_size, file_digest(file_path))
+        return states
+
+    def stat_changed(self, path, file_names, states):
+        '''To check with mtime and size only whether the files differ from the recorded states.'''
+        for file_name in file_names:
+            stat = os.stat(os.path.join(path, file_name))
+            state = states.get(file_name)
+            if state is None or state[0] != stat.st_mtime or state[1] != stat.st_size:
+                return True
+        return len(file_names) != len(states)
+
+    def scan_changes(self):
+        '''To compare data_path with the recorded file states.
+
+            Returns:
+                changed     # 新增或内容发生变化的文件
+                removed     # 已被删除的文件
+        '''
+        states = self.scan_states(self.data_path, self.list_files(self.data_path), self.file_states)
+        changed = [file_name for file_name, state in states.items()
+                   if file_name not in self.file_states or self.file_states[file_name][2] != state[2]]
+        removed = [file_name for file_name in self.file_states if file_name not in states]
+        self.file_states = states
+        return changed, removed
+
+    def rosters_changed(self):
+        '''To check whether the content of the rosters has changed since they were read.'''
+        if self.roster_states is None:
+            return True
+        file_names = self.list_rosters()
+        if not self.stat_changed(self.student_list_path, file_names, self.roster_states):
+            return False
+        states = self.scan_states(self.student_list_path, file_names, self.roster_states)
+        digests = {file_name: state[2] for file_name, state in states.items()}
+        if digests != {file_name: state[2] for file_name, state in self.roster_states.items()}:
+            return True
+        # 只有修改时间变化
+        self.roster_states = states
+        return False
+
+    def is_outdated(self, config=None):
+        '''To check whether data_path or student_list_path has been changed since the last load.'''
+        if config is not None and (config.data_path != self.data_path or
+                                   config.student_list_path != self.student_list_path):
+            return True
+        if self.roster_states is None or \
+                self.stat_changed(self.student_list_path, self.list_rosters(), self.roster_states):
+            return True
+        return self.stat_changed(self.data_path, self.list_files(self.data_path), self.file_states)
+
+    def reload(self, config=None):
+        '''To reload the changed files in data_path and student_list_path, return True if anything has been
+        reloaded.'''
+        if config is not None and (config.data_path != self.data_path or
+                                   config.student_list_path != self.student_list_path):
+            # 名单已缓存，切换名单文件夹时不需要重新解析
+            self.config = config
+            self.data_path = config.data_path
+            self.student_list_path = config.student_list_path
+            self.load()
+            return True
+        if self.rosters_changed():
+            self.load_students()
+            self.refresh()
+            return True
+        if not self.is_outdated():
+            return False
+        return self.refresh()
+
+    def parse_file_name(self, file_name):
+        '''To get the student_year and the semester from a file name like F1526002-2015-2016-1.xls.'''
+        # 从班级号中识别学生的年级
+        student_year = "20" + file_name[1:3]
+        # 从file_name中识别学期
+        fn_split_list = file_name.split('.')[0].split('-')
+        semester = Semester(fn_split_list[1], fn_split_list[2], fn_split_list[3])
+        return student_year, semester
+
+    def read_files(self, file_names):
+        # file_name exemple: F1526002-2015-2016-1.xls
+        parse_list = []
+        for file_name in file_names:
+            # 检查file_name
+            suffix = file_name.split(".")[-1]
+            if suffix != "xls":
+                logger.warning("无法读取%s文件!", file_name)
+                self.add_load_msg(file_name, "无法读取" + file_name + "文件!")
+                continue
+            sheet = None
+            if self.sheet_cache is not None:
+                sheet = self.sheet_cache.get(self.file_states[file_name][2])
+            if sheet is None:
+                parse_list.append(file_name)
+            else:
+                self.instrument.count("cached_files")
+                self.sheets[file_name] = sheet
+
+        # 没有缓存的文件并行解析，结果按文件名顺序合并
+        for file_name, sheet, error in self.parse_files(parse_list):
+            if error is not None and isinstance(error, QueryCancelled):
+                raise error
+            if error is not None:
+                logger.warning("读取%s文件出错: %s", file_name, error)
+                self.add_load_msg(file_name, "读取{}文件出错：{}".format(file_name, error))
+                continue
+            self.instrument.count("parsed_files")
+            self.sheets[file_name] = sheet
+            if self.sheet_cache is not None:
+                self.sheet_cache.put(self.file_states[file_name][2], sheet)
+
+    def parse_files(self, file_names):
+        '''To parse the files with a process pool.
+
+            Returns:
+                list of (file_name, sheet, error) in the order of file_names, error is None if succeeded
+        '''
+        workers = self.config.workers
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(file_names))
+
+        results = []
+        if workers <= 1:
+            for i, file_name in enumerate(file_names):
+                self.report("解析" + file_name, i, len(file_names))
+                try:
+                    results.append((file_name, self.load_xls(file_name), None))
+                except Exception as e:
+                    results.append((file_name, None, e))
+            return results
+
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(parse_xls, os.path.join(self.data_path, file_name))
+                       for file_name in file_names]
+            try:
+                for i, (file_name, future) in enumerate(zip(file_names, futures)):
+                    self.report("解析" + file_name, i, len(file_names))
+                    try:
+                        results.append((file_name, future.result(), None))
+                    except Exception as e:
+                        results.append((file_name, None, e))
+            except QueryCancelled:
+                # 取消还没有开始的任务
+                for future in futures:
+                    future.cancel()
+                raise
+        return results
+
+    def index_files(self):
+        '''To rebuild file_list, data_list and studentyear_semester_dic from the loaded sheets.'''
+        self.file_list = sorted(self.sheets)
+        self.data_list = [self.sheets[file_name] for file_name in self.file_list]
+        self.studentyear_semester_dic = {}
+        for file_name in self.file_list:
+            student_year, semester = self.parse_file_name(file_name)
+            semester = semester.to_str()
+            if student_year in self.studentyear_semester_dic:
+                if semester not in self.studentyear_semester_dic[student_year]:
+                    self.studentyear_semester_dic[student_year].append(semester)
+            else:
+                self.studentyear_semester_dic[student_year] = [semester]
+
+    def retract_file(self, file_name):
+        '''To remove the sheet of a file and all the grades read from it.'''
+        self.sheets.pop(file_name, None)
+        self.load_msgs.pop(file_name, None)
+        self.grade_store.remove(file_name)
+
+    def clean_msg(self):
+        # 只清除上一次查询的信息，保留读取文件时的信息
+        self.msg = list(self.load_msg)
+
+    def get_msg(self):
+        return self.msg
+
+    def add_msg(self, m):
+        if m not in self.msg:
+            self.msg.append(m)
+
+    def add_load_msg(self, source, m):
+        '''To add a message of reading a file, it is kept until the file is retracted. source is None for the
+        rosters.'''
+        msgs = self.load_msgs.setdefault(source, [])
+        if m not in msgs:
+            msgs.append(m)
+        self.add_msg(m)
+
+    def collect_load_msg(self):
+        '''To rebuild load_msg from the messages of the rosters and of the files which are still loaded.'''
+        self.load_msg = []
+        sources = [None] + sorted(source for source in self.load_msgs if source is not None)
+        for source in sources:
+            for m in self.load_msgs.get(source, ()):
+                if m not in self.load_msg:
+                    self.load_msg.append(m)
+
+    def check_data(self, student_year, semesters):
+        flag = True
+        msg = []
+        if student_year in self.studentyear_semester_dic:
+            for semester in semesters:
+                if semester.to_str() not in self.studentyear_semester_dic[student_year]:
+                    msg.append("缺少{}级学生在{}学期的成绩！".format(student_year, semester.to_str()))
+                    flag = False
+        else:
+            flag = False
+            msg.append("缺少{}级学生的成绩！".format(student_year))
+        return flag, msg
+
+    # 初始化学生信息
+    def load_students(self):
+        '''To read all the rosters again, the grades of the loaded files are added again for the new students.'''
+        roster_states = self.scan_states(self.student_list_path, self.list_rosters(), self.roster_states or {})
+        # 读取完成前被取消时，下次 reload 重新读取名单
+        self.roster_states = None
+        self.load_msgs.pop(None, None)
+        self.student_dic = StudentRegistry()
+        with self.instrument.stage("roster"):
+            self.init_student_dic(roster_states)
+        # 不在名单中的学生的成绩没有保存，已读取的文件需要重新添加
+        for file_name in self.file_list:
+            self.load_msgs.pop(file_name, None)
+        with self.instrument.stage("update"):
+            self.update(self.file_list)
+        # 姓名、专业等可能变化
+        self.query_cache.clear()
+        self.roster_states = roster_states
+
+    def init_student_dic(self, roster_states):
+        '''To add the students of the rosters, roster_states is {file_name: (mtime, size, hash)} from scan_states.'''
+        self.report("读取学生信息")
+        for file_name in sorted(roster_states):
+            file_path = os.path.join(self.student_list_path, file_name)
+            roster = self.load_roster(file_path, roster_states[file_name][2])
+            if roster is None:
+                continue
+            student_year = file_name[0:5]
+            for student_name, student_id, class_id, major, source in zip(
+                    *[roster[column].tolist() for column in ROSTER_COLUMNS]):
+                student = Student(student_name, student_id, student_year, class_id, major, source, self.grade_store)
+                if not self.student_dic.add(student):
+                    logger.warning("学号%s重复！", student_id)
+                    self.add_load_msg(None, "学号{}重复！".format(student_id))
+            self.instrument.count("students", roster.shape[0])
+
+    def load_roster(self, file_path, digest=None):
+        '''To read a roster through the cache, which is keyed by the hash of the file.'''
+        if self.sheet_cache is not None:
+            if digest is None:
+                digest = file_digest(file_path)
+            digest = digest + "-roster"
+            roster = self.sheet_cache.get(digest)
+            if roster is not None:
+                self.instrument.count("cached_rosters")
+                return roster
+        try:
+            roster = read_roster(file_path)
+        except Exception as e:
+            logger.warning("读取名单%s出错: %s", file_path, e)
+            self.add_load_msg(None, "读取名单{}出错：{}".format(os.path.basename(file_path), e))
+            return None
+        if self.sheet_cache is not None:
+            self.sheet_cache.put(digest, roster)
+        return roster
+
+    def load_xls(self, file_name):
+        logger.debug("parse %s", file_name)
+        return parse_xls(os.path.join(self.data_path, file_name))
+
+    # 读取学生成绩信息并转换为数据结构
+    def update(self, file_names):
+        # 遍历新读取的xls文件
+        for i, file_name in enumerate(file_names):
+            self.report("读取" + file_name + "的成绩", i, len(file_names))
+            if file_name not in self.sheets:
+                continue
+            sheet = self.sheets[file_name]
+            logger.debug("update %s", file_name)
+            # xls文件名上有 班级，学期信息
+            _, semester = self.parse_file_name(file_name)
+            # 一次性把整个sheet转换为每门课一行的长表
+            rows, course_names, course_credits, student_grades = sheet_to_long(sheet)
+            self.instrument.count("rows", sheet.shape[0])
+            self.instrument.count("grades", len(rows))
+            student_ids = np.asarray([normalize_id(student_id) for student_id in sheet["学号"].values], dtype=object)
+            student_names = sheet["姓名"].values
+            class_ids = sheet["班号"].values
+
+            # 按学号检查这些学生是否已经存在
+            known = np.asarray([student_id in self.student_dic.students for student_id in student_ids], dtype=bool)
+            for row in np.nonzero(~known)[0]:
+                logger.warning("缺少%s%s的基本信息！", class_ids[row], student_names[row])
+                self.add_load_msg(file_name, "缺少" + class_ids[row] + student_names[row] + "的基本信息！")
+            keep = known[rows]
+            # 将这一学期的成绩按来源文件添加到成绩数据中，文件被删除或修改时撤回
+            n_wrong = self.grade_store.add(file_name, semester, student_ids[rows[keep]], course_names[keep],
+                                           course_credits[keep], student_grades[keep], student_ids[known])
+            if n_wrong > 0:
+                logger.warning("%s中有%d个无法识别的成绩", file_name, n_wrong)
+                self.add_load_msg(file_name, "{}中有{}个无法识别的成绩！".format(file_name, n_wrong))
+
+    # 返回学生信息字典{student_id, student}, 支持选择班级
+    def get_student_dic(self, student_year, class_id=None, student_id=None):
+        if class_id is not None:
+            students = self.student_dic.query(student_year=student_year, class_id=class_id)
+        elif student_id is not None:
+            students = self.student_dic.query(student_year=student_year, student_id=student_id)
+        else:
+            students = self.student_dic.query(student_year=student_year)
+        return {student.get_key(): student for student in students}
+
+    # 得到某个同学的成绩数据，可以用学号或者姓名
+    # 返回 Grades_data 的 list
+    def list_grades(self, student_name, show=False):
+        student = self.student_dic.get(student_name)
+        if student is None:
+            students = self.student_dic.query(student_name=student_name)
+            if len(students) == 0:
+                logger.info("没有找到 %s", student_name)
+                self.add_msg("没有找到 {}".format(student_name))
+                return None
+            if len(students) > 1:
+                logger.info("有多个名为%s的学生，请使用学号", student_name)
+                self.add_msg("有多个名为{}的学生，请使用学号".format(student_name))
+            student = students[0]
+        if show:
+            student.show()
+        return student.get_grades_data()
+
+    # 输出Excel表格
+    def write_excel(self, students, semesters, config, save=False):
+        logger.debug("semesters %s", semesters)
+        self.config = config
+        self.clean_msg()
+        logger.debug("config %s", vars(self.config))
+        self.instrument.count("queries")
+
+        # 整个年级只计算一次，再按专业、招生来源分组排名
+        self.report("计算成绩")
+        with self.instrument.stage("metrics"):
+            df = self.get_metric_frame(students, semesters)
+        group_names = []
+        if self.config.sort_by_major:
+            group_names.append("专业")
+        if self.config.sort_by_source:
+            group_names.append("招生来源")
+        with self.instrument.stage("rank"):
+            groups = self.rank_groups(df, group_names)
+
+        # 输出路径
+        if save:
+            with self.instrument.stage("export"):
+                self.save_excel(groups)
+        self.write_report()
+        if len(group_names) > 0:
+            return list(groups.values()), self.get_msg()
+        return groups["sheet1"], self.get_msg()
+
+    def save_excel(self, groups):
+        '''To write every group into a sheet of the output file, or into a file for csv and parquet.
+
+            Returns:
+                list of the written file paths
+        '''
+        if not os.path.exists(self.config.output_path):
+            os.mkdir(self.config.output_path)
+        file_path = os.path.join(self.config.output_path, self.config.file_name)
+        export_format = self.config.export_format
+        file_paths = []
+        try:
+            if export_format == "xlsx" and self.config.streaming:
+                write_xlsx_stream(file_path, groups)
+                file_paths.append(file_path)
+            elif export_format == "xlsx":
+                with pd.ExcelWriter(file_path) as writer:
+                    for group_name, df in groups.items():
+                        df.to_excel(writer, sheet_name=excel_sheet_name(group_name))
+                file_paths.append(file_path)
+            elif export_format == "csv":
+                for group_name, df in groups.items():
+                    file_paths.append(export_path(file_path, group_name, len(groups), ".csv"))
+                    write_csv(file_paths[-1], df)
+            elif export_format == "parquet":
+                for group_name, df in groups.items():
+                    file_paths.append(export_path(file_path, group_name, len(groups), ".parquet"))
+                    df.to_parquet(file_paths[-1], index=False)
+            else:
+                raise ValueError("Unknown export format: " + str(export_format))
+        except ImportError as e:
+            # parquet 需要安装 pyarrow
+            logger.warning("导出失败: %s", e)
+            self.add_msg("导出{}文件失败：{}".format(export_format, e))
+        # 最近一次导出的文件
+        self.saved_paths = file_paths
+        return file_paths
+
+    def get_metric_frame(self, students, semesters):
+        '''To get the table of the students and their GPA and CAA, computed for all the students at once.
+
+            The table is cached until the grades change, changing only the order, the groups or the rank method
+            reuses it. A copy is returned, the ranks are added to the copy.
+        '''
+        students = list(students)
+        key = (tuple(student.get_key() for student in students), tuple(semester.to_code() for semester in semesters),
+               self.config.cal_gpa, self.config.cal_caa, self.config.grade_scale.key())
+        version = self.grade_store.version
+        cached = self.query_cache.get(key, version)
+        if cached is not None:
+            self.instrument.count("cached_queries")
+            df, student_msgs = cached
+        else:
+            df, student_msgs = self.make_metric_frame(students, semesters)
+            self.query_cache.put(key, version, (df, student_msgs), int(df.memory_usage(deep=True).sum()))
+
+        for student, msg in zip(students, student_msgs):
+            # 同一个学生会被多次查询，只保留本次查询的信息
+            student.msg = msg
+            for temp_msg in msg:
+                self.add_msg(temp_msg)
+        return df.copy()
+
+    def make_metric_frame(self, students, semesters):
+        '''To compute the table of get_metric_frame, return (table, the messages of every student).'''
+        for student in students:
+            student.clean_msg()
+        metrics = self.calculate_metrics(students, semesters)
+
+        df = pd.DataFrame({"姓名": [student.get_student_name() for student in students],
+                           "学号": [student.get_student_id() for student in students],
+                           "班级": [student.get_class_id() for student in students],
+                           "专业": [student.get_major() for student in students],
+                           "招生来源": [student.get_source() for student in students]},
+                          columns=["姓名", "学号", "班级", "专业", "招生来源"])
+        if self.config.cal_gpa:
+            df["GPA"] = metrics["gpa"].to_numpy()
+            df["GPA总学分"] = metrics["credit"].to_numpy()
+        if self.config.cal_caa:
+            df["学积分"] = metrics["caa"].to_numpy()
+            df["学积分总学分"] = metrics["credit"].to_numpy()
+        return df, tuple(student.msg for student in students)
+
+    def rank_groups(self, df, group_names):
+        '''To rank the students within the groups, then split and sort every group.
+
+            Arguments:
+                group_names     # 分组的列，例如 ["专业", "招生来源"]，为空时整体作为 sheet1
+
+            Returns:
+                dict {group_name: DataFrame}，group_name 例如 "IE信息工程-法语"，按第一个学生出现的顺序
+        '''
+        if len(group_names) == 0:
+            keys = pd.Series("sheet1", index=df.index)
+        else:
+            keys = df[group_names[0]].astype(str)
+            for group_name in group_names[1:]:
+                keys = keys + '-' + df[group_name].astype(str)
+
+        # 所有组的排名一次算完
+        if self.config.cal_gpa:
+            df['GPA排名'] = rank_values(df['GPA'], self.config.rank_method, keys)
+        if self.config.cal_caa:
+            df['学积分排名'] = rank_values(df['学积分'], self.config.rank_method, keys)
+
+        groups = {}
+        for group_name, group in df.groupby(keys, sort=False):
+            groups[group_name] = self.sort_dataframe(group.reset_index(drop=True))
+        if len(groups) == 0:
+            groups["sheet1"] = df
+        return groups
+
+    def sort_dataframe(self, df):
+        if self.config.sort_by_gpa:
+            df = top_k(df, 'GPA', self.config.top_k)
+        elif self.config.sort_by_caa:
+            df = top_k(df, '学积分', self.config.top_k)
+        else:
+            df = df.sort_values(by=['学号'], ascending=True)
+        logger.debug("%s", df)
+        return df
+
+    def calculate_metrics(self, students, semesters):
+        '''To calculate the GPA, the CAA and the total credit of all the students at once.
+
+            Returns:
+                pandas.DataFrame in the order of students, columns:
+                    gpa     # GPA
+                    caa     # 学积分
+                    credit  # 总学分（不含P）
+        '''
+        keys = [student.get_key() for student in students]
+        sums = self.grade_store.sum_grades(keys, semesters, self.config.grade_scale)
+        # 检查每个学生在每个学期是否都有成绩
+        enrolled = self.grade_store.find_enrolled(keys, semesters)
+        for i, j in zip(*np.nonzero(~enrolled)):
+            student, semester = students[i], semesters[j]
+            logger.info("没有找到 %s %s %s 学期成绩", student.get_class_id(), student.get_student_name(),
+                        semester.to_str())
+            student.add_msg("没有找到 {} {} {} 学期成绩".format(student.get_class_id(), student.get_student_name(),
+                                                           semester.to_str()))
+        return pd.DataFrame({"gpa": sums["point"] / sums["credit"],
+                             "caa": sums["score"] / sums["credit"],
+                             "credit": sums["credit"]})
+
+    def show(self):
+        for s, g in self.student_dic.items():
+            g.show()
+
+    def show_data(self):
+        print(self.data_list)
+
+    def one_semester(self):
+        return self.data_list[0]
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+'''Command line of Gradesystem: export the rankings without the window.
+
+    Usage:
+        python grade_cli.py --grade 2015 --range 2015-2016-1:2016-2017-2 --group major --sort gpa
+'''
+
+import sys
+import argparse
+import logging
+
+from grade_backend import logger, Config, Controler, RANK_METHODS, semester_from_str, semester_from_code, \
+    semester_range
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="导出成绩排名，不启动图形界面。没有参数时启动图形界面。")
+    parser.add_argument("--grade", action="append", default=[],
+                        help="年级，例如 2015，可以重复，默认为所有有成绩的年级")
+    parser.add_argument("--range", action="append", default=[], dest="ranges",
+                        help="学期或学期范围，例如 2015-2016-1 或 2015-2016-1:2016-2017-2，可以重复，"
+                             "默认为该年级所有的学期")
+    parser.add_argument("--group", action="append", default=[], choices=["major", "source"],
+                        help="按专业或招生来源分组排名，可以重复")
+    parser.add_argument("--sort", choices=["id", "gpa", "caa"], default="id", help="排序方式")
+    parser.add_argument("--top-k", type=int, default=None, help="按GPA或学积分排序时只保留前k名")
+    parser.add_argument("--rank-method", choices=sorted(RANK_METHODS), default="min", help="并列时的排名方式")
+    parser.add_argument("--format", dest="export_format", choices=["xlsx", "csv", "parquet"], default="xlsx")
+    parser.add_argument("--streaming", action="store_true", help="逐行写入xlsx")
+    parser.add_argument("--data-path", default="../data/")
+    parser.add_argument("--student-list-path", default="../student_list/")
+    parser.add_argument("--output-path", default="../output/")
+    parser.add_argument("--cache-path", default="../cache/", help="解析缓存文件夹，为 none 时不使用缓存")
+    parser.add_argument("--workers", type=int, default=None, help="并行解析文件的进程数")
+    parser.add_argument("--report", default=None, help="把耗时统计写入这个json文件")
+    parser.add_argument("--profile", action="store_true", help="用 cProfile 记录函数耗时")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="显示更多的日志")
+    return parser.parse_args(argv)
+
+
+def batch_config(args):
+    '''To make the Config of a batch run from the command line arguments.'''
+    cache_path = args.cache_path
+    if cache_path is not None and cache_path.lower() == "none":
+        cache_path = None
+    config = Config(sort_by_gpa=args.sort == "gpa", sort_by_caa=args.sort == "caa",
+                    sort_by_major="major" in args.group, sort_by_source="source" in args.group,
+                    student_list_path=args.student_list_path, output_path=args.output_path,
+                    data_path=args.data_path, cache_path=cache_path, workers=args.workers,
+                    rank_method=args.rank_method, top_k=args.top_k, export_format=args.export_format,
+                    streaming=args.streaming, profile=args.profile, report_path=args.report)
+    return config
+
+
+def batch_ranges(controler, grade, ranges):
+    '''To get the (file name, semesters) of every report of a grade, the file names are the same as the UI.'''
+    if len(ranges) == 0:
+        # 默认为该年级有成绩的第一个学期到最后一个学期
+        codes = sorted(semester_from_str(text).to_code()
+                       for text in controler.studentyear_semester_dic.get(grade, []))
+        if len(codes) == 0:
+            return []
+        ranges = [semester_from_code(codes[0]).to_str() + ':' + semester_from_code(codes[-1]).to_str()]
+    result = []
+    for text in ranges:
+        if ':' in text:
+            first, last = [semester_from_str(part) for part in text.split(':', 1)]
+            file_name = "{}级{}_{}_{}-{}_{}_{}".format(grade, first.year_start, first.year_end, first.number,
+                                                    last.year_start, last.year_end, last.number)
+            result.append((file_name, semester_range(first, last)))
+        else:
+            semester = semester_from_str(text)
+            result.append(("{}级{}".format(grade, semester.to_str()), [semester]))
+    return result
+
+
+def run_batch(args):
+    '''To export every grade and semester range with one load of the data, return the exit code.'''
+    config = batch_config(args)
+    controler = Controler(config)
+    for m in controler.get_msg():
+        logger.warning("%s", m)
+    grades = args.grade
+    if len(grades) == 0:
+        grades = sorted(controler.studentyear_semester_dic)
+
+    status = 0
+    for grade in grades:
+        for file_name, semesters in batch_ranges(controler, grade, args.ranges):
+            if len(semesters) == 0:
+                logger.error("%s 的学期范围为空，结束学期早于开始学期", file_name)
+                status = 1
+                continue
+            flag, warning = controler.check_data(grade, semesters)
+            if not flag:
+                for m in warning:
+                    logger.error("%s", m)
+                status = 1
+                continue
+            students = controler.get_student_dic(grade + "级")
+            report_config = batch_config(args)
+            report_config.set_file_name(file_name)
+            _, msg = controler.write_excel(students.values(), semesters, report_config, save=True)
+            for m in msg:
+                logger.info("%s", m)
+            for file_path in controler.saved_paths:
+                print(file_path)
+    return status
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if len(argv) == 0:
+        # 只有启动图形界面时才导入 PyQt5
+        from grade_ui import run_ui
+        return run_ui()
+    args = parse_args(argv)
+    level = [logging.WARNING, logging.INFO, logging.DEBUG][min(args.verbose, 2)]
+    logging.basicConfig(level=level, format="%(asctime)s %(levelname)s %(message)s")
+    return run_batch(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,686 @@
+# -*- coding: utf-8 -*-
+'''UI part of Gradesystem.'''
+
+import os
+import sys
+import re
+import threading
+import logging
+
+import numpy as np
+import pandas as pd
+from PyQt5.QtWidgets import QApplication, QCheckBox, QWidget, QToolTip, QPushButton, \
+    QMessageBox, QDesktopWidget, QMainWindow, QGridLayout, QRadioButton, QGroupBox, QVBoxLayout, QComboBox, QLabel, \
+    QTableView, QLineEdit, QAction, QTextEdit, QFileDialog, QProgressBar, QAbstractItemView
+from PyQt5.QtGui import QIcon, QFont, QBrush, QTextOption, QFontMetrics
+from PyQt5.QtCore import Qt, QCoreApplication, QObject, QRunnable, QThreadPool, pyqtSignal, QAbstractTableModel, \
+    QModelIndex, QVariant
+
+from grade_backend import Config, Controler, Semester, QueryCancelled, semester_range
+
+
+class WorkerSignals(QObject):
+    '''Signals of QueryWorker, a QRunnable can not have signals itself.'''
+    progress = pyqtSignal(object, str, int, int)
+    finished = pyqtSignal(object, object)
+    failed = pyqtSignal(object, str)
+
+
+class DataFrameModel(QAbstractTableModel):
+    ''' Show a DataFrame in a QTableView.
+
+        The cells are formatted only when the view asks for them, so a large result
+        does not create one item per cell.
+
+        Arguments:
+            columns     # 表格的列名，DataFrame中按列名取数据
+
+    '''
+
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.frame = pd.DataFrame(columns=self.columns)
+        self.values = [np.array([]) for _ in self.columns]
+        self.font = QFont("song", 12)
+        self.headerFont = QFont("song", 12, QFont.Bold)
+
+    def set_frame(self, frame):
+        self.beginResetModel()
+        if frame is None:
+            frame = pd.DataFrame(columns=self.columns)
+        self.frame = frame.reindex(columns=self.columns).reset_index(drop=True)
+        self.values = [np.asarray(self.frame[column]) for column in self.columns]
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.frame.shape[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        if role == Qt.DisplayRole:
+            return str(self.values[index.column()][index.row()])
+        if role == Qt.FontRole:
+            return self.font
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignHCenter | Qt.AlignVCenter
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal:
+            if role == Qt.DisplayRole:
+                return self.columns[section]
+            if role == Qt.FontRole:
+                return self.headerFont
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignHCenter | Qt.AlignVCenter
+        elif role == Qt.DisplayRole:
+            return str(section + 1)
+        return QVariant()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0 or self.frame.shape[0] == 0:
+            return
+        # 稳定排序，空值排在最后
+        self.layoutAboutToBeChanged.emit()
+        self.frame = self.frame.sort_values(self.columns[column], ascending=(order == Qt.AscendingOrder),
+                                            kind="mergesort", na_position="last").reset_index(drop=True)
+        self.values = [np.asarray(self.frame[name]) for name in self.columns]
+        self.layoutChanged.emit()
+
+
+class QueryWorker(QRunnable):
+    ''' Run a query in QThreadPool so that the window does not freeze.
+
+        Arguments:
+            job     # job(progress)，在后台线程中运行，不能操作界面，返回值通过 finished 信号传回
+
+    '''
+
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+        self.signals = WorkerSignals()
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def progress(self, message, done=0, total=0):
+        if self.cancelled:
+            raise QueryCancelled()
+        self.signals.progress.emit(self, message, done, total)
+
+    def run(self):
+        try:
+            result = self.job(self.progress)
+        except QueryCancelled:
+            return
+        except Exception as e:
+            self.signals.failed.emit(self, "查询出错：{}".format(e))
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(self, result)
+
+
+class UI(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.initUI()
+
+    def initUI(self):
+        self.config = Config()
+        self.controler = None
+        # 查询在线程池中运行，同一时间只有一个查询使用 controler
+        self.threadPool = QThreadPool.globalInstance()
+        self.controlerLock = threading.Lock()
+        self.worker = None
+        self.students = {}
+        self.semesters = []
+        self.resize(1000, 800)
+        self.center()
+        self.setWindowTitle("上海交大-巴黎高科卓越工程师学院学积分管理系统")
+
+        font = QFont("song", 10)
+        QToolTip.setFont(font)
+        self.setToolTip('欢迎使用学积分管理系统')
+        self.setWindowIcon(QIcon('icon.png'))
+
+        menubar = self.menuBar()
+        optionMenu = menubar.addMenu("选项")
+        # studentFileOption = QAction("打开学生信息存放位置", self)
+        # optionMenu.addAction(studentFileOption)
+        # inputFileOption = QAction("打开成绩文件存放位置", self)
+        # optionMenu.addAction(inputFileOption)
+        toExcelOption = QAction("导出当前查询结果至Excel文件", self)
+        optionMenu.addAction(toExcelOption)
+        # outputFileOption = QAction("打开导出文件存放位置", self)
+        # optionMenu.addAction(outputFileOption)
+        optionMenu.triggered[QAction].connect(self.processTrigger)
+
+        aboutMenu = menubar.addMenu("关于")
+        howOption = QAction("使用说明", self)
+        aboutMenu.addAction(howOption)
+        contactOption = QAction("联系我们", self)
+        aboutMenu.addAction(contactOption)
+        aboutMenu.triggered[QAction].connect(self.aboutTrigger)
+
+        self.createFileLayout()
+        self.createSearchLayout()
+        self.createPeriodLayout()
+        self.createResultLayout()
+        self.createMessageLayout()
+
+        windowLayout = QVBoxLayout()
+        windowLayout.addWidget(self.fileGroupBox)
+        windowLayout.addWidget(self.searchGroupBox)
+        windowLayout.addWidget(self.periodGroupBox)
+        windowLayout.addWidget(self.resultGroupBox)
+        windowLayout.addWidget(self.msgGroupBox)
+
+        widget = QWidget()
+        widget.setLayout(windowLayout)
+        self.setCentralWidget(widget)
+
+        self.progressBar = QProgressBar()
+        self.progressBar.setMaximumWidth(300)
+        self.progressBar.hide()
+        self.statusBar().addPermanentWidget(self.progressBar)
+        self.show()
+
+    def center(self):
+        qr = self.frameGeometry()
+        cp = QDesktopWidget().availableGeometry().center()
+        qr.moveCenter(cp)
+        self.move(qr.topLeft())
+
+    def processTrigger(self, process):
+        if process.text() == "打开成绩文件存放位置":
+            os.system("start explorer ..\\data")
+        elif process.text() == "打开学生信息存放位置":
+            os.system("start explorer ..\\student_list")
+        elif process.text() == "导出当前查询结果至Excel文件":
+            filePath, ok = QFileDialog.getSaveFileName(self,
+                                                       "文件保存",
+                                                       "../output/",
+                                                       "Excel Files (*.xlsx)")
+            tempPath = filePath.split('/')
+            fileName = tempPath[-1]
+            output_path = ""
+            for i in range(len(tempPath) - 1):
+                output_path += (tempPath[i] + '/')
+            self.config.set_output_path(output_path)
+            self.config.set_file_name(fileName)
+            if self.controler is None:
+                return
+            if self.worker is not None:
+                self.showMsg(["查询还在进行，请在查询完成后导出"])
+                return
+            # 导出也在线程池中运行，不阻塞界面
+            config, students, semesters = self.config, self.students, self.semesters
+            self.startWorker(lambda progress: self.runExport(config, students, semesters, progress))
+
+    def aboutTrigger(self, process):
+        if process.text() == "使用说明":
+            self.window = aboutWindow(["本软件使用过程应遵循以下步骤：",
+                                       "1.打开“选项——打开学生信息存放位置”，放入学生信息文件。该文件应为excel格式，并将有招生来源和专业的sheet命名为录取结果。",
+                                       "2.打开“选项——打开成绩文件存放位置”，放入成绩文件。文件应为excel格式，命名格式为“班级号-起始年份-结束年份-学期数”，如“F1526001-2015-2016-2”。",
+                                       "3.在主界面选择相关选项后，点击查询即可查看结果。查询结果可导出为excel文件，可以打开“选项——导出当前查询结果至Excel文件”选择存放位置并命名文件。"])
+            self.window.show()
+        elif process.text() == "联系我们":
+            self.window = aboutWindow(["软件使用过程中如有任何问题请联系开发者：",
+                                       "郑勤锴 2363471925@qq.com",
+                                       "胡敏浩 hmh0205@qq.com"])
+            self.window.show()
+
+    def createFileLayout(self):
+        self.fileGroupBox = QGroupBox("信息存放位置")
+        gridlayout = QGridLayout()
+
+        self.lb_student_list = QLabel("学生信息存放位置：")
+        self.studentEdit = QLineEdit()
+        self.studentEdit.setReadOnly(True)
+        self.studentEdit.setPlaceholderText(os.path.realpath(self.config.student_list_path))
+
+        self.lb_note = QLabel("成绩信息存放位置：")
+        self.noteEdit = QLineEdit()
+        self.noteEdit.setReadOnly(True)
+        self.noteEdit.setPlaceholderText(os.path.realpath(self.config.data_path))
+
+        self.btn_open_student_list = QPushButton("打开", self)
+        self.btn_open_student_list.setFixedWidth(100)
+        self.btn_open_student_list.setToolTip("打开存放学生信息文件夹")
+        self.btn_open_student_list.resize(self.btn_open_student_list.sizeHint())
+        self.btn_open_student_list.clicked.connect(
+            lambda: self.openfileClicked(os.path.realpath(self.config.student_list_path)))
+
+        self.btn_edit_student_list = QPushButton("更改", self)
+        self.btn_edit_student_list.setFixedWidth(100)
+        self.btn_edit_student_list.setToolTip("更改存放学生信息文件夹")
+        self.btn_edit_student_list.resize(self.btn_edit_student_list.sizeHint())
+        self.btn_edit_student_list.clicked.connect(lambda: self.editfileClicked("student_list"))
+
+        self.btn_open_note = QPushButton("打开", self)
+        self.btn_open_note.setFixedWidth(100)
+        self.btn_open_note.setToolTip("打开存放成绩信息文件夹")
+        self.btn_open_note.resize(self.btn_open_note.sizeHint())
+        self.btn_open_note.clicked.connect(lambda: self.openfileClicked(os.path.realpath(self.config.data_path)))
+
+        self.btn_edit_note = QPushButton("更改", self)
+        self.btn_edit_note.setFixedWidth(100)
+        self.btn_edit_note.setToolTip("更改存放成绩信息文件夹")
+        self.btn_edit_note.resize(self.btn_edit_note.sizeHint())
+        self.btn_edit_note.clicked.connect(lambda: self.editfileClicked("note"))
+
+        gridlayout.addWidget(self.lb_student_list, 0, 0)
+        gridlayout.addWidget(self.studentEdit, 0, 1)
+        gridlayout.addWidget(self.btn_open_student_list, 0, 2)
+        gridlayout.addWidget(self.btn_edit_student_list, 0, 3)
+        gridlayout.addWidget(self.lb_note, 1, 0)
+        gridlayout.addWidget(self.noteEdit, 1, 1)
+        gridlayout.addWidget(self.btn_open_note, 1, 2)
+        gridlayout.addWidget(self.btn_edit_note, 1, 3)
+
+        self.fileGroupBox.setLayout(gridlayout)
+
+    def createSearchLayout(self):
+        self.searchGroupBox = QGroupBox("基础查询")
+        gridlayout = QGridLayout()
+
+        self.lb_grade = QLabel("年级：")
+        self.lb_grade.setFixedWidth(50)
+        self.cb_grade = QComboBox()
+        self.cb_grade.setObjectName("年级")
+        for grade in range(2012, 2030):
+            self.cb_grade.addItem(str(grade))
+
+        self.lb_major = QLabel("专业：")
+        self.lb_major.setFixedWidth(50)
+        self.cb_major = QComboBox()
+        self.cb_major.setObjectName("专业")
+        self.cb_major.addItems(["不限专业", "IE信息工程", "ME机械工程", "EPE能源与动力工程"])
+
+        self.lb_year = QLabel("学年：")
+        self.lb_year.setFixedWidth(50)
+        self.cb_year = QComboBox()
+        self.cb_year.setObjectName("学年")
+        for year in range(2012, 2030):
+            self.cb_year.addItem(str(year) + "-" + str(year + 1))
+
+        self.lb_semester = QLabel("学期：")
+        self.lb_semester.setFixedWidth(50)
+        self.cb_semester = QComboBox()
+        self.cb_semester.setObjectName("学期")
+        self.cb_semester.addItems(["第一学期", "第二学期"])
+
+        self.lb_rank = QLabel("排名类型: ")
+        self.cb_rank = QComboBox()
+        self.cb_rank.setObjectName("排名类型")
+        self.cb_rank.addItems(["学号排名", "GPA排名", "学积分排名"])
+
+        self.btn_search = QPushButton("查询", self)
+        self.btn_search.setFixedWidth(100)
+        self.btn_search.setToolTip("选择好各选项后点击查询成绩")
+        self.btn_search.resize(self.btn_search.sizeHint())
+        self.btn_search.clicked.connect(self.searchClicked)
+
+        self.lb_type = QLabel("招生来源: ")
+        self.cb_type = QComboBox()
+        self.cb_type.setObjectName("招生来源")
+        self.cb_type.addItems(["不限来源", "法语", "工科试验班类（中外合作办学）"])
+
+        self.lb_number = QLabel("学号：")
+        self.numberEdit = QLineEdit()
+        self.numberEdit.setPlaceholderText("请输入学号，如为空则默认查询全年级")
+        self.numberEdit.setFixedWidth(300)
+
+        gridlayout.addWidget(self.lb_grade, 0, 0)
+        gridlayout.addWidget(self.cb_grade, 0, 1)
+        gridlayout.addWidget(self.lb_major, 0, 2)
+        gridlayout.addWidget(self.cb_major, 0, 3)
+        gridlayout.addWidget(self.lb_year, 0, 4)
+        gridlayout.addWidget(self.cb_year, 0, 5)
+        gridlayout.addWidget(self.lb_semester, 0, 6)
+        gridlayout.addWidget(self.cb_semester, 0, 7)
+        gridlayout.addWidget(self.btn_search, 0, 8)
+        gridlayout.addWidget(self.lb_type, 1, 0)
+        gridlayout.addWidget(self.cb_type, 1, 1)
+        gridlayout.addWidget(self.lb_rank, 1, 2)
+        gridlayout.addWidget(self.cb_rank, 1, 3)
+        gridlayout.addWidget(self.lb_number, 1, 4)
+        gridlayout.addWidget(self.numberEdit, 1, 5)
+
+        self.searchGroupBox.setLayout(gridlayout)
+
+    def createPeriodLayout(self):
+        self.periodGroupBox = QGroupBox("高级查询")
+        gridlayout = QGridLayout()
+
+        self.lb_year1 = QLabel("起始学年：")
+        self.lb_year1.setFixedWidth(80)
+        self.cb_year1 = QComboBox()
+        self.cb_year1.setObjectName("起始学年")
+        for year in range(2012, 2030):
+            self.cb_year1.addItem(str(year) + "-" + str(year + 1))
+
+        self.lb_semester1 = QLabel("学期：")
+        self.lb_semester1.setFixedWidth(50)
+        self.cb_semester1 = QComboBox()
+        self.cb_semester1.setObjectName("学期")
+        self.cb_semester1.addItems(["第一学期", "第二学期"])
+
+        self.lb_year2 = QLabel("结束学年：")
+        self.lb_year2.setFixedWidth(80)
+        self.cb_year2 = QComboBox()
+        self.cb_year2.setObjectName("结束学年")
+        for year in range(2012, 2030):
+            self.cb_year2.addItem(str(year) + "-" + str(year + 1))
+
+        self.lb_semester2 = QLabel("学期：")
+        self.lb_semester2.setFixedWidth(50)
+        self.cb_semester2 = QComboBox()
+        self.cb_semester2.setObjectName("学期")
+        self.cb_semester2.addItems(["第一学期", "第二学期"])
+
+        self.btn_search = QPushButton("查询", self)
+        self.btn_search.setFixedWidth(100)
+        self.btn_search.setToolTip('选择好时间段后点击查询成绩')
+        self.btn_search.resize(self.btn_search.sizeHint())
+        self.btn_search.clicked.connect(self.periodClicked)
+
+        gridlayout.addWidget(self.lb_year1, 0, 0)
+        gridlayout.addWidget(self.cb_year1, 0, 1)
+        gridlayout.addWidget(self.lb_semester1, 0, 2)
+        gridlayout.addWidget(self.cb_semester1, 0, 3)
+        gridlayout.addWidget(self.lb_year2, 0, 4)
+        gridlayout.addWidget(self.cb_year2, 0, 5)
+        gridlayout.addWidget(self.lb_semester2, 0, 6)
+        gridlayout.addWidget(self.cb_semester2, 0, 7)
+        gridlayout.addWidget(self.btn_search, 0, 10)
+
+        self.periodGroupBox.setLayout(gridlayout)
+
+    def createResultLayout(self):
+        self.resultGroupBox = QGroupBox("查询结果")
+        gridlayout = QGridLayout()
+        self.tableClass = ["学号", "姓名", "班级", "招生来源", "专业", "GPA", "GPA总学分", "GPA排名",
+                           "学积分", "学积分总学分", "学积分排名"]
+        self.tableModel = DataFrameModel(self.tableClass, self)
+        self.table = QTableView()
+        self.table.setModel(self.tableModel)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        # 行高固定，不逐行计算
+        self.table.verticalHeader().setDefaultSectionSize(QFontMetrics(QFont("song", 12)).height() + 8)
+        # 列宽只按前100行计算
+        self.table.horizontalHeader().setResizeContentsPrecision(100)
+        self.table.resizeColumnsToContents()
+
+        gridlayout.addWidget(self.table)
+        self.resultGroupBox.setLayout(gridlayout)
+
+    def createMessageLayout(self):
+        self.msgGroupBox = QGroupBox("查询信息")
+        self.msgGroupBox.setMaximumHeight(200)
+        gridlayout = QGridLayout()
+        self.msgBox = QTextEdit()
+        self.msgBox.setReadOnly(True)
+        gridlayout.addWidget(self.msgBox)
+        self.msgGroupBox.setLayout(gridlayout)
+
+    def openfileClicked(self, file_path):
+        os.system("start explorer " + file_path)
+
+    def editfileClicked(self, path_type):
+        if path_type == 'student_list':
+            path = QFileDialog.getExistingDirectory(self, "更改学生信息文件夹")
+            self.config.set_student_list_path(path)
+            self.studentEdit.setPlaceholderText(os.path.realpath(self.config.student_list_path))
+        elif path_type == 'note':
+            path = QFileDialog.getExistingDirectory(self, "更改成绩信息文件夹")
+            self.config.set_data_path(path)
+            self.noteEdit.setPlaceholderText(os.path.realpath(self.config.data_path))
+
+    def newConfig(self):
+        # 每次查询使用新的排序选项，但保留用户选择的文件夹
+        return Config(student_list_path=self.config.student_list_path, output_path=self.config.output_path,
+                      data_path=self.config.data_path)
+
+    def getControler(self, config, progress=None):
+        # Controler 常驻内存，只有成绩文件夹发生变化时才重新读取
+        if self.controler is None:
+            self.controler = Controler(config, progress)
+        else:
+            self.controler.set_progress(progress)
+            self.controler.reload(config)
+        return self.controler
+
+    def queryOptions(self, config):
+        # 在界面线程中读取选项
+        grade = self.cb_grade.currentText() + "级"
+        student_id = None
+        if self.numberEdit.text() != "":
+            student_id = int(self.numberEdit.text())
+        else:
+            if self.cb_rank.currentText() == 'GPA排名':
+                config.sort_by_gpa = True
+
+            elif self.cb_rank.currentText() == '学积分排名':
+                config.sort_by_caa = True
+
+            if not self.cb_type.currentText() == '不限来源':
+                config.sort_by_source = True
+
+            if not self.cb_major.currentText() == '不限专业':
+                config.sort_by_major = True
+        return grade, student_id
+
+    def searchClicked(self):
+        config = self.newConfig()
+        grade, student_id = self.queryOptions(config)
+
+        year = self.cb_year.currentText().split("-")
+        if self.cb_semester.currentText() == "第一学期":
+            semester = '1'
+        else:
+            semester = '2'
+        semester1 = Semester(year[0], year[1], semester)
+        semesters = [semester1]
+        config.set_file_name(grade + year[0] + '-' + year[1] + '-' + semester)
+        self.startQuery(config, grade, student_id, semesters)
+
+    def periodClicked(self):
+        config = self.newConfig()
+        grade, student_id = self.queryOptions(config)
+
+        year1 = self.cb_year1.currentText().split("-")
+        if self.cb_semester1.currentText() == "第一学期":
+            st1 = '1'
+        else:
+            st1 = '2'
+        year2 = self.cb_year2.currentText().split("-")
+        if self.cb_semester2.currentText() == "第一学期":
+            st2 = '1'
+        else:
+            st2 = '2'
+        semester1 = Semester(year1[0], year1[1], st1)
+        semester2 = Semester(year2[0], year2[1], st2)
+        if semester2 < semester1:
+            self.showMsg(["结束学期不能早于开始学期！"])
+            return
+
+        semesters = semester_range(semester1, semester2)
+
+        config.set_file_name(
+            grade + year1[0] + '_' + year1[1] + '_' + st1 + '-' + year2[0] + '_' + year2[1] + '_' + st2)
+        self.startQuery(config, grade, student_id, semesters)
+
+    def startQuery(self, config, grade, student_id, semesters):
+        # 新的查询会取消还在运行的查询
+        if self.worker is not None:
+            self.worker.cancel()
+        self.config = config
+        self.tableModel.set_frame(None)
+        self.startWorker(lambda progress: self.runQuery(config, grade, student_id, semesters, progress))
+
+    def startWorker(self, job):
+        '''To run job(progress) in the thread pool, its result is shown by queryFinished.'''
+        self.worker = QueryWorker(job)
+        self.worker.signals.progress.connect(self.showProgress)
+        self.worker.signals.finished.connect(self.queryFinished)
+        self.worker.signals.failed.connect(self.queryFailed)
+        self.progressBar.setRange(0, 0)
+        self.progressBar.show()
+        self.threadPool.start(self.worker)
+
+    def runQuery(self, config, grade, student_id, semesters, progress):
+        '''To run a query in the worker thread, the widgets must not be used here.'''
+        with self.controlerLock:
+            try:
+                controler = self.getControler(config, progress)
+                if student_id is not None:
+                    students = controler.get_student_dic(grade, student_id=student_id)
+                else:
+                    students = controler.get_student_dic(grade)
+                flag, warning = controler.check_data(grade[:-1], semesters)
+                if not flag:
+                    return students, semesters, None, warning
+                data, msg = controler.write_excel(students.values(), semesters, config)
+                return students, semesters, data, msg
+            finally:
+                # 查询结束、出错或被取消后，不再向这个查询报告进度
+                if self.controler is not None:
+                    self.controler.set_progress(None)
+
+    def runExport(self, config, students, semesters, progress):
+        '''To export the current result in the worker thread.'''
+        with self.controlerLock:
+            self.controler.set_progress(progress)
+            try:
+                data, msg = self.controler.write_excel(students.values(), semesters, config, save=True)
+                return students, semesters, data, msg
+            finally:
+                self.controler.set_progress(None)
+
+    def showProgress(self, worker, message, done, total):
+        if worker is not self.worker:
+            return
+        self.progressBar.setRange(0, total)
+        self.progressBar.setValue(done)
+        self.statusBar().showMessage(message)
+
+    def queryFinished(self, worker, result):
+        # 已经被取消的查询的结果不再显示
+        if worker is not self.worker:
+            return
+        self.worker = None
+        self.progressBar.hide()
+        self.statusBar().clearMessage()
+        self.students, self.semesters, data, msg = result
+        if data is not None:
+            self.showResult(data)
+        self.showMsg(msg)
+
+    def queryFailed(self, worker, message):
+        if worker is not self.worker:
+            return
+        self.worker = None
+        self.progressBar.hide()
+        self.statusBar().clearMessage()
+        self.showMsg([message])
+
+    def showResult(self, data):
+        # 分组查询时返回每组一个DataFrame的list，找到与选项对应的一组
+        if isinstance(data, list):
+            groups = data
+            data = groups[0]
+            for temp_data in groups:
+                if self.config.sort_by_source and \
+                        not self.infoMatch(temp_data["招生来源"][0], self.cb_type.currentText(), 'source'):
+                    continue
+                if self.config.sort_by_major and \
+                        not self.infoMatch(temp_data['专业'][0], self.cb_major.currentText(), 'major'):
+                    continue
+                data = temp_data
+                break
+
+        # 新的结果保持查询时的排序，点击表头再由模型重新排序
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.tableModel.set_frame(data)
+        self.table.resizeColumnsToContents()
+
+    def infoMatch(self, string_1, string_2, type):
+        if type == 'source':
+            search_list = ['工科', '法语']
+        elif type == 'major':
+            search_list = ['IE', 'ME', 'EPE']
+        else:
+            return False
+        for element in search_list:
+            if (re.search(element, string_1) is not None) and (re.search(element, string_2) is not None):
+                return True
+        return False
+
+    def showMsg(self, msg):
+        self.msgBox.clear()
+        for msgs in msg:
+            if type(msgs).__name__ == 'str':
+                self.msgBox.append(msgs)
+
+    def rankType(self, btn):
+        if btn.text() == "GPA排名":
+            if btn.isChecked():
+                self.rank = 'gpa'
+        elif btn.text() == "学积分排名":
+            if btn.isChecked():
+                self.rank = 'caa'
+
+    def closeEvent(self, QCloseEvent):
+        reply = QMessageBox.question(self, "Message",
+                                     "是否确认退出?", QMessageBox.Yes |
+                                     QMessageBox.No, QMessageBox.No)
+
+        if reply == QMessageBox.Yes:
+            QCloseEvent.accept()
+        else:
+            QCloseEvent.ignore()
+
+
+class aboutWindow(QWidget):
+    def __init__(self, Info):
+        super().__init__()
+        self.init_window(Info)
+
+    def init_window(self, Info):
+        self.setWindowTitle('关于')
+        self.resize(500, 400)
+        self.aboutInfo = QTextEdit()
+        self.aboutInfo.setReadOnly(True)
+        for info in Info:
+            self.aboutInfo.append(info)
+        windowLayout = QVBoxLayout(self)
+        windowLayout.addWidget(self.aboutInfo)
+        self.setLayout(windowLayout)
+
+
+def run_ui():
+    if not os.path.exists("..\\data"):
+        os.makedirs("..\\data")
+    if not os.path.exists("..\\output"):
+        os.makedirs("..\\output")
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
+    app = QApplication(sys.argv)
+    ex = UI()
+    return app.exec_()
+
+
+if __name__ == '__main__':
+    sys.exit(run_ui())